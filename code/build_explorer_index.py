@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Build the static explorer's configuration lookup table
+
+Every configuration with N_MIN <= n <= N_MAX is scored by the Python
+model and written to a fixed-stride binary blob, one record per
+configuration at the configuration's combinatorial rank, so the page
+(web/catalog_lookup.js) finds any configuration with O(1) arithmetic and
+shows exactly what the Python model computes.
+
+Layout (little endian):
+    header   magic b'QCDX', u8 version, u8 n_min, u8 n_max, u8 slots,
+             u32 records, u16 stride, u16 reserved
+    record   f32 threshold, then `slots` J entries of
+             f32 mass, f32 dE, u8 status code (0xFF = unused), u8 pad,
+             u16 discovery priority rank (0 = not ranked)
+J entries follow coupled_spins(n) order, i.e. ascending J.
+
+Usage:
+    python3 build_explorer_index.py --out ../web/catalog_index.bin
+"""
+
+import argparse
+import os
+import struct
+from math import comb
+
+import numpy as np
+import pandas as pd
+
+from catalog_keys import FLAVORS, STATUSES, canonical, count_matrix, status_codes
+from entropy_forbidden_states import evaluate_status_array
+from generate_catalog import iter_configurations
+from spin_coupling import coupled_spins
+
+MAGIC = b'QCDX'
+VERSION = 1
+N_MIN = 2
+N_MAX = 6
+HEADER = struct.Struct('<4sBBBBIHH')
+SLOT = np.dtype([('mass', '<f4'), ('dE', '<f4'), ('status', 'u1'),
+                 ('pad', 'u1'), ('priority', '<u2')])
+UNUSED = 0xFF
+
+PRIORITY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', 'data', 'discovery_priority.csv')
+
+def n_configurations(n, k=len(FLAVORS)):
+    """Multisets of size n over k flavours"""
+    return comb(n + k - 1, n)
+
+def config_rank(quarks, n_min=N_MIN):
+    """
+    Position of a configuration in catalog order, computed directly from
+    its sorted flavour indices (combinatorial number system).
+    """
+    k = len(FLAVORS)
+    idx = [FLAVORS.index(ch) for ch in canonical(quarks)]
+    n = len(idx)
+    rank = sum(n_configurations(m) for m in range(n_min, n))
+    lo = 0
+    for pos, v in enumerate(idx):
+        rest = n - pos - 1
+        for w in range(lo, v):
+            rank += comb(rest + k - w - 1, rest)
+        lo = v
+    return rank
+
+def priority_ranks(path=PRIORITY_FILE):
+    """(canonical quarks, 2J) -> 1-based rank in the discovery priority list"""
+    if not os.path.exists(path):
+        return {}
+    df = pd.read_csv(path, usecols=['quarks', 'J'])
+    return {(canonical(q), int(round(2 * J))): i + 1
+            for i, (q, J) in enumerate(zip(df['quarks'], df['J']))}
+
+def build_records(n_min=N_MIN, n_max=N_MAX, priority_file=PRIORITY_FILE):
+    """Score all configurations and pack them into a structured record array"""
+    slots = max(len(coupled_spins(n)) for n in range(n_min, n_max + 1))
+    record = np.dtype([('threshold', '<f4'), ('J', SLOT, (slots,))])
+
+    configs = list(iter_configurations(n_max, n_min))
+    counts = count_matrix(configs)
+    n = counts.sum(axis=1)
+
+    # 2J of each slot for each n, -1 where n has fewer J values
+    slot_two_j = np.full((n_max + 1, slots), -1, dtype=np.int64)
+    for m in range(n_min, n_max + 1):
+        for slot, (two_j, _) in enumerate(coupled_spins(m)):
+            slot_two_j[m, slot] = two_j
+
+    records = np.zeros(len(configs), dtype=record)
+    records['J']['status'] = UNUSED
+    ranks = priority_ranks(priority_file)
+    configs = np.array(configs)
+    for slot in range(slots):
+        two_j = slot_two_j[n, slot]
+        used = two_j >= 0
+        status, mass, threshold, dE = evaluate_status_array(counts[used], two_j[used] / 2)
+        entry = records['J'][used, slot]
+        entry['mass'] = mass
+        entry['dE'] = dE
+        entry['status'] = status_codes(status)
+        entry['priority'] = [ranks.get((q, tj), 0) for q, tj in zip(configs[used], two_j[used])]
+        records['J'][used, slot] = entry
+        if slot == 0:
+            records['threshold'] = threshold
+    return records, slots
+
+def write_index(out_path, n_min=N_MIN, n_max=N_MAX, priority_file=PRIORITY_FILE):
+    records, slots = build_records(n_min, n_max, priority_file)
+    with open(out_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, n_min, n_max, slots,
+                            len(records), records.dtype.itemsize, 0))
+        f.write(records.tobytes())
+    return len(records), records.dtype.itemsize
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Build the explorer lookup table')
+    parser.add_argument('--out', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                      '..', 'web', 'catalog_index.bin'))
+    parser.add_argument('--n-max', type=int, default=N_MAX)
+    args = parser.parse_args()
+
+    n_records, stride = write_index(args.out, n_max=args.n_max)
+    print(f"Wrote {n_records:,} configurations x {stride} bytes to {os.path.normpath(args.out)}")
+    print(f"Status codes: {dict(enumerate(STATUSES))}")
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Diff two catalog versions
+
+Rows are joined on packed (configuration, 2J) keys. Both catalogs are
+streamed in chunks and hash-partitioned to temporary files, then each
+partition pair is joined in memory, so memory is bounded by one
+partition regardless of catalog size. Changed rows are spilled per
+partition and k-way merged, so the report lists each change type in key
+(catalog) order whatever the partition count.
+
+Usage:
+    python3 catalog_diff.py old_catalog.csv new_catalog.csv --tol 1e-6 --out diff.csv
+"""
+
+import argparse
+import heapq
+import math
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from catalog_keys import (STATUSES, key_bucket, pack_keys, quark_strings,
+                          status_codes, unpack_counts)
+
+CHUNK_ROWS = 500_000
+PARTITION_BYTES = 256 << 20  # CSV bytes per partition
+
+RECORD = np.dtype([('key', '<i8'), ('status', 'i1'), ('dE', '<f8')])
+CHANGE = np.dtype([('key', '<i8'), ('old_status', 'i1'), ('new_status', 'i1'),
+                   ('old_dE', '<f8'), ('new_dE', '<f8')])
+
+CHANGE_TYPES = ['status', 'dE', 'added', 'removed']
+
+REPORT_COLUMNS = ['change', 'quarks', 'J', 'old_status', 'new_status',
+                  'old_dE', 'new_dE']
+
+def _spill(csv_path, prefix, n_parts, chunksize):
+    """Stream a catalog into per-partition record files; return row count"""
+    files = [open(f'{prefix}_{p}.bin', 'wb') for p in range(n_parts)]
+    rows = 0
+    try:
+        reader = pd.read_csv(csv_path, usecols=['quarks', 'J', 'status', 'dE'],
+                             chunksize=chunksize)
+        for chunk in reader:
+            rec = np.empty(len(chunk), dtype=RECORD)
+            rec['key'] = pack_keys(chunk['quarks'].to_numpy(), chunk['J'].to_numpy())
+            rec['status'] = status_codes(chunk['status'].to_numpy())
+            rec['dE'] = chunk['dE'].to_numpy()
+            parts = key_bucket(rec['key'], n_parts)
+            for p in np.unique(parts):
+                rec[parts == p].tofile(files[p])
+            rows += len(chunk)
+    finally:
+        for f in files:
+            f.close()
+    return rows
+
+def _load(path):
+    rec = np.fromfile(path, dtype=RECORD)
+    rec = rec[np.argsort(rec['key'], kind='stable')]
+    dup = np.zeros(len(rec), dtype=bool)
+    dup[1:] = rec['key'][1:] == rec['key'][:-1]
+    # Keep the last occurrence of a duplicated key
+    keep = np.append(~dup[1:], True)
+    return rec[keep], int(dup.sum())
+
+def _changes(keys, old=None, new=None):
+    """Change records for key-sorted rows; status -1 / NaN dE mark a missing side"""
+    rec = np.empty(len(keys), dtype=CHANGE)
+    rec['key'] = keys
+    rec['old_status'] = -1 if old is None else old['status']
+    rec['new_status'] = -1 if new is None else new['status']
+    rec['old_dE'] = np.nan if old is None else old['dE']
+    rec['new_dE'] = np.nan if new is None else new['dE']
+    return rec
+
+def _report(change, rec):
+    counts, two_j = unpack_counts(rec['key'])
+    labels = np.array(STATUSES + [''], dtype=object)  # code -1 -> ''
+    return pd.DataFrame({
+        'change': change,
+        'quarks': quark_strings(counts),
+        'J': two_j / 2,
+        'old_status': labels[rec['old_status']],
+        'new_status': labels[rec['new_status']],
+        'old_dE': rec['old_dE'],
+        'new_dE': rec['new_dE'],
+    }, columns=REPORT_COLUMNS)
+
+def _merge_sorted(paths, batch=CHUNK_ROWS):
+    """k-way merge of key-sorted CHANGE files, yielding record batches in key order"""
+    parts = [np.memmap(p, dtype=CHANGE, mode='r') for p in paths if os.path.getsize(p)]
+    def stream(s):
+        return ((int(k), s, j) for j, k in enumerate(parts[s]['key']))
+
+    streams = [stream(s) for s in range(len(parts))]
+    out = []
+    for _, s, j in heapq.merge(*streams):
+        out.append(parts[s][j])
+        if len(out) == batch:
+            yield np.array(out, dtype=CHANGE)
+            out = []
+    if out:
+        yield np.array(out, dtype=CHANGE)
+
+def _join_partition(old, new, tol):
+    """Classify one partition pair; returns (counts, {change type: key-sorted records})"""
+    common, i_old, i_new = np.intersect1d(old['key'], new['key'],
+                                          assume_unique=True, return_indices=True)
+    o, n = old[i_old], new[i_new]
+    flipped = o['status'] != n['status']
+    shift = np.abs(n['dE'] - o['dE'])
+    # NaN on one side is a shift; NaN on both sides is not
+    both_nan = np.isnan(o['dE']) & np.isnan(n['dE'])
+    shifted = ~flipped & ~(shift <= tol) & ~both_nan
+
+    removed = np.ones(len(old), dtype=bool)
+    removed[i_old] = False
+    added = np.ones(len(new), dtype=bool)
+    added[i_new] = False
+
+    counts = {
+        'matched': len(common),
+        'status_flips': int(flipped.sum()),
+        'dE_shifts': int(shifted.sum()),
+        'added': int(added.sum()),
+        'removed': int(removed.sum()),
+    }
+    changes = {
+        'status': _changes(common[flipped], o[flipped], n[flipped]),
+        'dE': _changes(common[shifted], o[shifted], n[shifted]),
+        'added': _changes(new['key'][added], new=new[added]),
+        'removed': _changes(old['key'][removed], old=old[removed]),
+    }
+    return counts, changes
+
+def diff_catalogs(old_csv, new_csv, out_csv=None, tol=1e-9,
+                  partitions=None, chunksize=CHUNK_ROWS, tmp_dir=None):
+    """
+    Compare two catalogs. Returns a dict of counts; if out_csv is given,
+    every changed row is written there, grouped by change type and sorted
+    by key within each type, so the file does not depend on `partitions`.
+    """
+    if partitions is None:
+        size = max(os.path.getsize(old_csv), os.path.getsize(new_csv))
+        partitions = max(1, math.ceil(size / PARTITION_BYTES))
+
+    summary = {'old_rows': 0, 'new_rows': 0, 'matched': 0, 'status_flips': 0,
+               'dE_shifts': 0, 'added': 0, 'removed': 0, 'duplicates': 0}
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as tmp:
+        summary['old_rows'] = _spill(old_csv, os.path.join(tmp, 'old'), partitions, chunksize)
+        summary['new_rows'] = _spill(new_csv, os.path.join(tmp, 'new'), partitions, chunksize)
+
+        change_files = {c: [] for c in CHANGE_TYPES}
+        for p in range(partitions):
+            old, dup_old = _load(os.path.join(tmp, f'old_{p}.bin'))
+            new, dup_new = _load(os.path.join(tmp, f'new_{p}.bin'))
+            summary['duplicates'] += dup_old + dup_new
+            counts, changes = _join_partition(old, new, tol)
+            for k, v in counts.items():
+                summary[k] += v
+            if out_csv:
+                for change, rec in changes.items():
+                    path = os.path.join(tmp, f'{change}_{p}.bin')
+                    rec.tofile(path)
+                    change_files[change].append(path)
+
+        if out_csv:
+            pd.DataFrame(columns=REPORT_COLUMNS).to_csv(out_csv, index=False)
+            for change in CHANGE_TYPES:
+                for rec in _merge_sorted(change_files[change], chunksize):
+                    _report(change, rec).to_csv(out_csv, mode='a', header=False, index=False)
+
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Diff two catalog versions')
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--tol', type=float, default=1e-9,
+                        help='report dE shifts larger than this (GeV)')
+    parser.add_argument('--out', help='write changed rows to this CSV')
+    parser.add_argument('--partitions', type=int,
+                        help='hash partitions (default: from input size)')
+    args = parser.parse_args()
+
+    summary = diff_catalogs(args.old, args.new, args.out, args.tol, args.partitions)
+    print(f"Old rows: {summary['old_rows']:,}   New rows: {summary['new_rows']:,}")
+    print(f"Matched:       {summary['matched']:,}")
+    print(f"Status flips:  {summary['status_flips']:,}")
+    print(f"dE shifts:     {summary['dE_shifts']:,} (tol {args.tol:g} GeV)")
+    print(f"Added:         {summary['added']:,}")
+    print(f"Removed:       {summary['removed']:,}")
+    if summary['duplicates']:
+        print(f"WARNING: {summary['duplicates']:,} duplicate keys (last occurrence kept)")
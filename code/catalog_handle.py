@@ -0,0 +1,388 @@
+"""
+Lazy, low-memory access to large catalogs
+
+A Catalog is a handle on a catalog CSV split into blocks of about
+CHUNK_ROWS rows. Nothing is loaded up front: filters are pushed down to a
+per-block zone map (min/max of B, S, J, n, the statuses present and the
+heavy flavours present) so blocks that cannot match are never read, and
+aggregates stream one block at a time. Only the rows asked for via
+head, sample or to_pandas are ever materialized.
+
+Approximate aggregates (approx=True) keep each candidate row with
+probability `fraction` and parse only the kept rows. They return an
+Estimate (value, stderr) so the caller can decide whether an exact pass
+is needed.
+
+    cat = Catalog.open('../data/forbidden_states_catalog.csv')
+    cat.value_counts('status')                         # exact, streamed
+    cat.value_counts('status', approx=True)            # estimate + stderr per value
+    charm = cat.where(B=(0.5, 2), heavy='c', status='Allowed')
+    charm['dE'].mean(), charm.sample(1000)
+"""
+
+import io
+import json
+import math
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from catalog_store import iter_chunks
+
+CHUNK_ROWS = 16384
+MAX_ROWS = 1_000_000  # default ceiling for materializing rows
+FLOAT_TOL = 1e-9
+ZONE_FORMAT = 2  # bump when block boundaries or zone contents change
+
+RANGE_COLUMNS = ['B', 'S', 'J', 'n']
+TEXT_COLUMNS = ['quarks', 'status']
+HEAVY = {'c': 'cC', 'b': 'bB'}
+
+def _zone_of(df):
+    """Zone-map entry for one block"""
+    zone = {'rows': len(df)}
+    for col in RANGE_COLUMNS:
+        zone[col] = [float(df[col].min()), float(df[col].max())] if len(df) else [0.0, 0.0]
+    zone['status'] = sorted(df['status'].unique().tolist())
+    zone['heavy'] = {h: bool(df['quarks'].str.contains(f'[{letters}]').any())
+                     for h, letters in HEAVY.items()}
+    return zone
+
+def _as_range(value):
+    """Normalize a predicate to ('range', lo, hi) or ('set', values)"""
+    if isinstance(value, tuple):
+        lo, hi = value
+        return 'range', -math.inf if lo is None else lo, math.inf if hi is None else hi
+    if isinstance(value, (list, set, frozenset)):
+        return 'set', list(value)
+    return 'range', value, value
+
+class Estimate(namedtuple('Estimate', ['value', 'stderr'])):
+    """Sample estimate with its standard error"""
+
+    def interval(self, z=1.96):
+        """Normal-approximation confidence interval (95% by default)"""
+        return self.value - z * self.stderr, self.value + z * self.stderr
+
+class Catalog:
+    """Lazy handle on a catalog file, optionally with filter predicates"""
+
+    def __init__(self, path, chunk_rows=CHUNK_ROWS, predicates=None, _zones=None):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.predicates = dict(predicates or {})
+        self._zones = _zones
+
+    @classmethod
+    def open(cls, path, chunk_rows=CHUNK_ROWS):
+        return cls(path, chunk_rows)
+
+    def __repr__(self):
+        preds = ', '.join(f'{k}={v!r}' for k, v in self.predicates.items())
+        return f'Catalog({self.path!r}{", " + preds if preds else ""})'
+
+    # ----- zone map -----
+
+    def _zone_file(self):
+        return os.path.splitext(self.path)[0] + '.zonemap.json'
+
+    def _signature(self):
+        st = os.stat(self.path)
+        return [st.st_size, st.st_mtime_ns, self.chunk_rows, ZONE_FORMAT]
+
+    @property
+    def zones(self):
+        """Per-block offsets and statistics, built once and cached beside the file"""
+        if self._zones is not None:
+            return self._zones
+        zone_file = self._zone_file()
+        if os.path.exists(zone_file):
+            with open(zone_file) as f:
+                cached = json.load(f)
+            if cached['signature'] == self._signature():
+                self._zones = cached
+                return cached
+
+        blocks = iter_chunks(self.path, self.chunk_rows)
+        _, header = next(blocks)
+        zones = {'signature': self._signature(),
+                 'header': header.decode().strip().split(','),
+                 'blocks': []}
+        for offset, block in blocks:
+            df = self._parse(block, zones['header'], ['quarks', 'B', 'S', 'J', 'status', 'n'])
+            zone = _zone_of(df)
+            zone.update(offset=offset, bytes=len(block))
+            zones['blocks'].append(zone)
+
+        try:
+            with open(zone_file, 'w') as f:
+                json.dump(zones, f)
+        except OSError:
+            pass  # read-only location: keep the zone map in memory only
+        self._zones = zones
+        return zones
+
+    @property
+    def columns(self):
+        return self.zones['header'] + ['n']
+
+    # ----- filtering -----
+
+    def where(self, **predicates):
+        """
+        New handle with extra filters. Values may be a scalar, a list/set
+        of allowed values or a (lo, hi) inclusive range (None = open).
+        heavy='c', 'b' or 'cb' keeps rows containing those heavy flavours.
+        Ranges are only allowed on numeric columns.
+        """
+        unknown = set(predicates) - set(self.columns) - {'heavy'}
+        if unknown:
+            raise KeyError(f"Unknown filter columns: {sorted(unknown)}")
+        for col in TEXT_COLUMNS:
+            if isinstance(predicates.get(col), tuple):
+                raise ValueError(f"Range filter on non-numeric column {col!r}; "
+                                 "pass a value or a list of values")
+        if set(predicates.get('heavy', '')) - set(HEAVY):
+            raise ValueError(f"heavy must be made of {sorted(HEAVY)}, got {predicates['heavy']!r}")
+        merged = {**self.predicates, **predicates}
+        return Catalog(self.path, self.chunk_rows, merged, self._zones)
+
+    def _block_may_match(self, zone):
+        for col, value in self.predicates.items():
+            if col == 'heavy':
+                if not all(zone['heavy'][h] for h in value):
+                    return False
+            elif col == 'status':
+                kind, *args = _as_range(value)
+                wanted = args[0] if kind == 'set' else [args[0]]
+                if not set(wanted) & set(zone['status']):
+                    return False
+            elif col in RANGE_COLUMNS:
+                lo_z, hi_z = zone[col]
+                kind, *args = _as_range(value)
+                if kind == 'set':
+                    if not any(lo_z - FLOAT_TOL <= v <= hi_z + FLOAT_TOL for v in args[0]):
+                        return False
+                elif args[0] > hi_z + FLOAT_TOL or args[1] < lo_z - FLOAT_TOL:
+                    return False
+        return True
+
+    def _row_mask(self, df):
+        mask = np.ones(len(df), dtype=bool)
+        for col, value in self.predicates.items():
+            if col == 'heavy':
+                for h in value:
+                    mask &= df['quarks'].str.contains(f'[{HEAVY[h]}]').to_numpy()
+                continue
+            values = df[col].to_numpy()
+            kind, *args = _as_range(value)
+            if kind == 'set':
+                if values.dtype.kind == 'f':
+                    mask &= np.isclose(values[:, None], np.asarray(args[0], dtype=float)[None, :],
+                                       rtol=0, atol=FLOAT_TOL).any(axis=1)
+                else:
+                    mask &= np.isin(values, args[0])
+            elif values.dtype.kind in 'fi':
+                mask &= (values >= args[0] - FLOAT_TOL) & (values <= args[1] + FLOAT_TOL)
+            else:
+                mask &= values == args[0]
+        return mask
+
+    def candidate_blocks(self):
+        """Indices of blocks the zone map cannot rule out"""
+        return [i for i, z in enumerate(self.zones['blocks']) if self._block_may_match(z)]
+
+    # ----- block reads -----
+
+    @staticmethod
+    def _parse(block, header, usecols):
+        read_cols = [c for c in usecols if c != 'n']
+        if 'n' in usecols and 'quarks' not in read_cols:
+            read_cols.append('quarks')
+        df = pd.read_csv(io.BytesIO(block), names=header, header=None, usecols=read_cols)
+        if 'n' in usecols:
+            df['n'] = df['quarks'].str.len()
+        return df
+
+    def _needed(self, columns):
+        cols = list(columns or self.columns)
+        for col in self.predicates:
+            cols.append('quarks' if col == 'heavy' else col)
+        return list(dict.fromkeys(cols))
+
+    def iter_blocks(self, columns=None, blocks=None):
+        """Yield filtered DataFrames, one per block, with the requested columns"""
+        header = self.zones['header']
+        needed = self._needed(columns)
+        out_cols = list(columns or self.columns)
+        blocks = self.candidate_blocks() if blocks is None else blocks
+        with open(self.path, 'rb') as f:
+            for i in blocks:
+                zone = self.zones['blocks'][i]
+                f.seek(zone['offset'])
+                df = self._parse(f.read(zone['bytes']), header, needed)
+                if self.predicates:
+                    df = df[self._row_mask(df)]
+                yield df[out_cols]
+
+    def iter_sampled(self, columns=None, fraction=0.1, seed=0):
+        """
+        Like iter_blocks, but each row of every candidate block is kept
+        independently with probability `fraction` (Bernoulli sampling);
+        only the kept lines are parsed.
+        """
+        if not 0 < fraction <= 1:
+            raise ValueError(f"fraction must be in (0, 1], got {fraction}")
+        rng = np.random.default_rng(seed)
+        header = self.zones['header']
+        needed = self._needed(columns)
+        out_cols = list(columns or self.columns)
+        with open(self.path, 'rb') as f:
+            for i in self.candidate_blocks():
+                zone = self.zones['blocks'][i]
+                f.seek(zone['offset'])
+                lines = f.read(zone['bytes']).splitlines(keepends=True)
+                keep = np.flatnonzero(rng.random(len(lines)) < fraction)
+                if not len(keep):
+                    continue
+                df = self._parse(b''.join(lines[j] for j in keep), header, needed)
+                if self.predicates:
+                    df = df[self._row_mask(df)]
+                yield df[out_cols]
+
+    # ----- aggregates -----
+    #
+    # Approximate versions are Horvitz-Thompson estimates from a Bernoulli
+    # row sample with inclusion probability p: a count of m sampled rows
+    # estimates m/p with variance m(1-p)/p^2, a sum of y estimates sum(y)/p
+    # with variance sum(y^2)(1-p)/p^2.
+
+    def count(self, approx=False, fraction=0.1, seed=0):
+        """Number of matching rows; approx=True returns an Estimate from a row sample"""
+        if not approx:
+            return sum(len(df) for df in self.iter_blocks(['quarks']))
+        m = sum(len(df) for df in self.iter_sampled(['quarks'], fraction, seed))
+        return Estimate(m / fraction, math.sqrt(m * (1 - fraction)) / fraction)
+
+    def value_counts(self, column, approx=False, fraction=0.1, seed=0):
+        """
+        Counts of each value of a column over matching rows. approx=True
+        returns a frame of estimated 'count' and its 'stderr' per value.
+        """
+        blocks = self.iter_sampled([column], fraction, seed) if approx else self.iter_blocks([column])
+        counts = pd.Series(dtype=np.int64)
+        for df in blocks:
+            counts = counts.add(df[column].value_counts(), fill_value=0)
+        counts.index.name = column
+        counts = counts.sort_values(ascending=False)
+        if not approx:
+            return counts.astype(np.int64).rename('count')
+        return pd.DataFrame({'count': counts / fraction,
+                             'stderr': np.sqrt(counts * (1 - fraction)) / fraction})
+
+    def _moments(self, column, blocks):
+        n, total, total_sq, lo, hi = 0, 0.0, 0.0, math.inf, -math.inf
+        for df in blocks:
+            values = df[column].to_numpy(dtype=np.float64)
+            if len(values):
+                n += len(values)
+                total += values.sum()
+                total_sq += (values ** 2).sum()
+                lo, hi = min(lo, values.min()), max(hi, values.max())
+        return n, total, total_sq, lo, hi
+
+    def mean(self, column, approx=False, fraction=0.1, seed=0):
+        """Mean over matching rows; approx=True returns an Estimate from a row sample"""
+        if not approx:
+            n, total, *_ = self._moments(column, self.iter_blocks([column]))
+            return total / n if n else math.nan
+        n, total, total_sq, _, _ = self._moments(column, self.iter_sampled([column], fraction, seed))
+        if n < 2:
+            return Estimate(total / n if n else math.nan, math.nan)
+        mean = total / n
+        var = (total_sq - n * mean ** 2) / (n - 1)
+        return Estimate(float(mean), math.sqrt(max(var, 0.0) * (1 - fraction) / n))
+
+    def sum(self, column, approx=False, fraction=0.1, seed=0):
+        """Sum over matching rows; approx=True returns an Estimate from a row sample"""
+        if not approx:
+            return self._moments(column, self.iter_blocks([column]))[1]
+        _, total, total_sq, _, _ = self._moments(column, self.iter_sampled([column], fraction, seed))
+        return Estimate(float(total) / fraction, math.sqrt(total_sq * (1 - fraction)) / fraction)
+
+    def min(self, column):
+        return self._moments(column, self.iter_blocks([column]))[3]
+
+    def max(self, column):
+        return self._moments(column, self.iter_blocks([column]))[4]
+
+    # ----- materialization -----
+
+    def head(self, n=5, columns=None):
+        parts = []
+        for df in self.iter_blocks(columns):
+            parts.append(df.head(n - sum(len(p) for p in parts)))
+            if sum(len(p) for p in parts) >= n:
+                break
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=columns or self.columns)
+
+    def sample(self, n, seed=0, columns=None):
+        """Uniform random sample of n matching rows, streamed with O(n) memory"""
+        rng = np.random.default_rng(seed)
+        kept, kept_keys = None, np.empty(0)
+        for df in self.iter_blocks(columns):
+            keys = np.concatenate([kept_keys, rng.random(len(df))])
+            pool = df if kept is None else pd.concat([kept, df], ignore_index=True)
+            if len(pool) > n:
+                idx = np.argpartition(keys, n)[:n]
+                pool, keys = pool.iloc[idx].reset_index(drop=True), keys[idx]
+            kept, kept_keys = pool.reset_index(drop=True), keys
+        if kept is None:
+            return pd.DataFrame(columns=columns or self.columns)
+        return kept.iloc[np.argsort(kept_keys)].reset_index(drop=True)
+
+    def to_pandas(self, columns=None, limit=MAX_ROWS):
+        """Materialize matching rows; raises if more than `limit` would be loaded"""
+        parts, rows = [], 0
+        for df in self.iter_blocks(columns):
+            rows += len(df)
+            if limit is not None and rows > limit:
+                raise MemoryError(f"{self!r} matches more than {limit:,} rows; "
+                                  "narrow it with where() or use sample()")
+            parts.append(df)
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=columns or self.columns)
+
+    def __getitem__(self, column):
+        if column not in self.columns:
+            raise KeyError(column)
+        return LazyColumn(self, column)
+
+class LazyColumn:
+    """One column of a Catalog; every operation streams the blocks"""
+
+    def __init__(self, catalog, name):
+        self.catalog = catalog
+        self.name = name
+
+    def __repr__(self):
+        return f'LazyColumn({self.name!r} of {self.catalog!r})'
+
+    def value_counts(self, **kwargs):
+        return self.catalog.value_counts(self.name, **kwargs)
+
+    def mean(self, **kwargs):
+        return self.catalog.mean(self.name, **kwargs)
+
+    def sum(self, **kwargs):
+        return self.catalog.sum(self.name, **kwargs)
+
+    def min(self):
+        return self.catalog.min(self.name)
+
+    def max(self):
+        return self.catalog.max(self.name)
+
+    def to_numpy(self, limit=MAX_ROWS):
+        return self.catalog.to_pandas([self.name], limit)[self.name].to_numpy()
@@ -0,0 +1,118 @@
+"""
+Packed integer keys for catalog rows
+
+A row is identified by its quark content and spin. Both are packed into
+one int64 so catalogs can be joined, sorted and sharded with plain
+integer arithmetic instead of string comparisons:
+
+    bits 48-51  n, total number of constituents
+    bits  8-47  one 4-bit field per flavour in FLAVORS order, holding 15 - count
+    bits  0-7   2J
+
+Storing 15 - count makes ascending key order identical to the catalog's
+generation order (n, then itertools.combinations_with_replacement over
+FLAVORS, then J).
+"""
+
+import numpy as np
+
+# Catalog letters: lower case quarks, upper case antiquarks (same order as ALL_TYPES)
+FLAVORS = 'udscbUDSCB'
+TYPE_NAMES = ['u', 'd', 's', 'c', 'b', 'u_bar', 'd_bar', 's_bar', 'c_bar', 'b_bar']
+
+MAX_COUNT = 15
+N_SHIFT = 48
+FLAVOR_SHIFT = 8
+TWOJ_MASK = 0xFF
+
+# Status labels in code order; codes are stored as int8
+STATUSES = ['Allowed', 'Energy', 'Pauli', 'Gauge']
+STATUS_CODE = {s: i for i, s in enumerate(STATUSES)}
+
+_HASH_MULT = np.uint64(0x9E3779B97F4A7C15)
+
+_SHIFTS = np.array([FLAVOR_SHIFT + 4 * (len(FLAVORS) - 1 - i)
+                    for i in range(len(FLAVORS))], dtype=np.int64)
+
+def flavor_counts(quarks):
+    """Per-flavour counts of a quark string, in FLAVORS order"""
+    counts = [quarks.count(ch) for ch in FLAVORS]
+    if sum(counts) != len(quarks):
+        raise ValueError(f"Unknown quark letter in {quarks!r}")
+    return counts
+
+def counts_to_cfg(counts):
+    """Flavour counts to the cfg dict used by entropy_forbidden_states"""
+    return {name: int(c) for name, c in zip(TYPE_NAMES, counts)}
+
+def canonical(quarks):
+    """Sort a quark string into catalog (FLAVORS) order"""
+    return ''.join(ch * c for ch, c in zip(FLAVORS, flavor_counts(quarks)))
+
+def pack_key(quarks, J):
+    """Packed key for one (quark string, J) pair"""
+    counts = flavor_counts(quarks)
+    if max(counts, default=0) > MAX_COUNT:
+        raise ValueError(f"Too many identical quarks in {quarks!r}")
+    key = len(quarks) << N_SHIFT
+    for c, shift in zip(counts, _SHIFTS):
+        key |= (MAX_COUNT - c) << int(shift)
+    return key | int(round(2 * J))
+
+def unpack_key(key):
+    """Inverse of pack_key: (canonical quark string, J)"""
+    key = int(key)
+    quarks = ''.join(ch * (MAX_COUNT - ((key >> int(shift)) & 0xF))
+                     for ch, shift in zip(FLAVORS, _SHIFTS))
+    return quarks, (key & TWOJ_MASK) / 2
+
+def count_matrix(quarks):
+    """(N, 10) flavour-count matrix for an array of quark strings"""
+    arr = np.asarray(quarks, dtype=object).astype(bytes)
+    width = arr.dtype.itemsize
+    letters = arr.view(np.uint8).reshape(len(arr), width)
+    counts = np.stack([(letters == ord(ch)).sum(axis=1) for ch in FLAVORS], axis=1)
+    lengths = (letters != 0).sum(axis=1)
+    if (counts.sum(axis=1) != lengths).any():
+        bad = arr[counts.sum(axis=1) != lengths][0].decode()
+        raise ValueError(f"Unknown quark letter in {bad!r}")
+    return counts.astype(np.int64)
+
+def pack_counts(counts, two_j):
+    """Vectorized pack from a count matrix and an array of 2J"""
+    counts = np.asarray(counts, dtype=np.int64)
+    if (counts > MAX_COUNT).any():
+        raise ValueError("Too many identical quarks for the packed key")
+    keys = counts.sum(axis=1) << N_SHIFT
+    keys |= ((MAX_COUNT - counts) << _SHIFTS).sum(axis=1)
+    return keys | np.asarray(two_j, dtype=np.int64)
+
+def pack_keys(quarks, J):
+    """Vectorized pack_key over arrays of quark strings and J"""
+    two_j = np.rint(2 * np.asarray(J, dtype=np.float64)).astype(np.int64)
+    return pack_counts(count_matrix(quarks), two_j)
+
+def unpack_counts(keys):
+    """(N, 10) flavour-count matrix and 2J array from packed keys"""
+    keys = np.asarray(keys, dtype=np.int64)
+    counts = MAX_COUNT - ((keys[:, None] >> _SHIFTS) & 0xF)
+    return counts, keys & TWOJ_MASK
+
+def quark_strings(counts):
+    """Canonical quark strings for each row of a count matrix"""
+    return [''.join(ch * int(c) for ch, c in zip(FLAVORS, row)) for row in counts]
+
+def key_bucket(keys, n_buckets):
+    """Stable bucket in [0, n_buckets) per key, hashed so structured keys spread evenly"""
+    mixed = np.asarray(keys, dtype=np.int64).astype(np.uint64) * _HASH_MULT
+    return ((mixed >> np.uint64(32)) % np.uint64(n_buckets)).astype(np.int64)
+
+def status_codes(status):
+    """Map status labels to int8 codes"""
+    status = np.asarray(status, dtype=object)
+    codes = np.full(len(status), -1, dtype=np.int8)
+    for label, code in STATUS_CODE.items():
+        codes[status == label] = code
+    if (codes < 0).any():
+        raise ValueError(f"Unknown status {status[codes < 0][0]!r}")
+    return codes
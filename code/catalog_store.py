@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Content-addressed chunk storage for hadron catalogs
+
+A catalog CSV is split into its header line plus blocks of whole rows.
+Block boundaries are content-defined: a block ends after a row whose
+CRC-32 is divisible by the target block size (within MIN/MAX bounds), so
+inserting or deleting rows only changes the blocks around the edit and
+later blocks keep their hashes. Each block is stored once under its
+SHA-256 and the manifest records the block list together with a binary
+hash tree; diffing, verifying or syncing a new version touches only the
+blocks whose content is not already known.
+
+Usage:
+    python3 catalog_store.py add data/forbidden_states_catalog.csv
+    python3 catalog_store.py verify data/forbidden_states_catalog.csv
+    python3 catalog_store.py fsck data/forbidden_states_catalog.manifest.json
+    python3 catalog_store.py diff old.manifest.json new.manifest.json
+    python3 catalog_store.py sync new.manifest.json /path/to/remote_store
+    python3 catalog_store.py checkout new.manifest.json out.csv
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import zlib
+
+CHUNK_ROWS = 16384  # average rows per block
+MIN_FRACTION = 4   # blocks hold at least CHUNK_ROWS / 4 rows
+MAX_FACTOR = 4     # and at most CHUNK_ROWS * 4
+STORE_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                          '..', 'data', '.catalog_store'))
+MANIFEST_FORMAT = 2
+
+def sha256_hex(data):
+    return hashlib.sha256(data).hexdigest()
+
+def is_boundary(line, chunk_rows=CHUNK_ROWS):
+    """True if a block may end after this row (depends on the row alone)"""
+    return zlib.crc32(line.rstrip(b'\r\n')) % chunk_rows == 0
+
+def iter_chunks(path, chunk_rows=CHUNK_ROWS):
+    """Yield (offset, bytes) blocks: the header line, then content-defined row blocks"""
+    min_rows = max(1, chunk_rows // MIN_FRACTION)
+    max_rows = chunk_rows * MAX_FACTOR
+    with open(path, 'rb') as f:
+        offset = 0
+        header = f.readline()
+        yield offset, header
+        offset += len(header)
+
+        lines = []
+        for line in f:
+            lines.append(line)
+            if len(lines) >= max_rows or \
+                    (len(lines) >= min_rows and is_boundary(line, chunk_rows)):
+                block = b''.join(lines)
+                yield offset, block
+                offset += len(block)
+                lines = []
+        if lines:
+            yield offset, b''.join(lines)
+
+def hash_tree(leaves):
+    """Binary hash tree over hex leaf hashes, as a list of levels (leaves first)"""
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        prev = levels[-1]
+        level = []
+        for i in range(0, len(prev), 2):
+            if i + 1 < len(prev):
+                level.append(sha256_hex(bytes.fromhex(prev[i]) + bytes.fromhex(prev[i + 1])))
+            else:
+                # Odd node is promoted unchanged
+                level.append(prev[i])
+        levels.append(level)
+    return levels
+
+def object_path(store_dir, digest):
+    return os.path.join(store_dir, 'objects', digest[:2], digest[2:])
+
+def _write_object(store_dir, digest, block):
+    """Store a block under its hash; return True if it was new"""
+    path = object_path(store_dir, digest)
+    if os.path.exists(path):
+        return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(block)
+    os.replace(tmp, path)
+    return True
+
+def default_manifest_path(csv_path):
+    return os.path.splitext(csv_path)[0] + '.manifest.json'
+
+def build_manifest(csv_path, store_dir=None, chunk_rows=CHUNK_ROWS):
+    """
+    Chunk and hash a catalog. If store_dir is given, blocks not yet in
+    the store are written to it. Returns (manifest, n_new_objects).
+    """
+    chunks = []
+    rows = 0
+    size = 0
+    n_new = 0
+    for i, (offset, block) in enumerate(iter_chunks(csv_path, chunk_rows)):
+        digest = sha256_hex(block)
+        n_rows = 0 if i == 0 else block.count(b'\n') + (not block.endswith(b'\n'))
+        chunks.append({'hash': digest, 'offset': offset,
+                       'bytes': len(block), 'rows': n_rows})
+        rows += n_rows
+        size += len(block)
+        if store_dir is not None:
+            n_new += _write_object(store_dir, digest, block)
+
+    tree = hash_tree([c['hash'] for c in chunks])
+    manifest = {
+        'format': MANIFEST_FORMAT,
+        'source': os.path.basename(csv_path),
+        'chunk_rows': chunk_rows,
+        'rows': rows,
+        'size': size,
+        'root': tree[-1][0],
+        'chunks': chunks,
+        'tree': tree[1:],
+    }
+    return manifest, n_new
+
+def write_manifest(manifest, path):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=1)
+        f.write('\n')
+    os.replace(tmp, path)
+
+def load_manifest(path):
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get('format') != MANIFEST_FORMAT:
+        raise ValueError(f"{path}: unsupported manifest format {manifest.get('format')}")
+    return manifest
+
+def add_catalog(csv_path, store_dir=STORE_DIR, manifest_path=None,
+                chunk_rows=CHUNK_ROWS):
+    """Store a catalog and write its manifest next to it"""
+    manifest, n_new = build_manifest(csv_path, store_dir, chunk_rows)
+    write_manifest(manifest, manifest_path or default_manifest_path(csv_path))
+    return manifest, n_new
+
+def changed_chunks(old, new):
+    """
+    Indices of chunks in `new` whose content does not appear in `old`.
+    Chunks are matched by hash, not position, so blocks that moved
+    because rows were inserted or deleted earlier are not reported. When
+    both trees have the same shape, equal subtrees are skipped by
+    descending from the root first.
+    """
+    if old['root'] == new['root']:
+        return []
+
+    old_leaves = [c['hash'] for c in old['chunks']]
+    new_leaves = [c['hash'] for c in new['chunks']]
+    candidates = range(len(new_leaves))
+    if len(old_leaves) == len(new_leaves):
+        old_levels = [old_leaves] + old['tree']
+        new_levels = [new_leaves] + new['tree']
+        frontier = [0]
+        for depth in range(len(new_levels) - 1, 0, -1):
+            below = new_levels[depth - 1]
+            nxt = []
+            for node in frontier:
+                for child in (2 * node, 2 * node + 1):
+                    if child < len(below) and old_levels[depth - 1][child] != below[child]:
+                        nxt.append(child)
+            frontier = nxt
+        candidates = frontier
+
+    known = set(old_leaves)
+    return [i for i in candidates if new_leaves[i] not in known]
+
+def verify_file(csv_path, manifest, chunks=None):
+    """
+    Re-hash selected chunks of a catalog file in place (all by default).
+    Returns the indices whose content does not match the manifest. The
+    file size is always compared; a mismatch flags the last chunk even
+    if it was not among the chunks re-hashed.
+    """
+    entries = manifest['chunks']
+    indices = range(len(entries)) if chunks is None else chunks
+    bad = []
+    with open(csv_path, 'rb') as f:
+        for i in indices:
+            c = entries[i]
+            f.seek(c['offset'])
+            if sha256_hex(f.read(c['bytes'])) != c['hash']:
+                bad.append(i)
+
+    # Trailing bytes past the last chunk count against the last chunk
+    last = len(entries) - 1
+    if os.path.getsize(csv_path) != manifest['size'] and last not in bad:
+        bad.append(last)
+    return bad
+
+def verify_store(manifest, store_dir=STORE_DIR, chunks=None):
+    """Check that selected chunk objects exist in the store and are intact"""
+    entries = manifest['chunks']
+    indices = range(len(entries)) if chunks is None else chunks
+    bad = []
+    for i in indices:
+        path = object_path(store_dir, entries[i]['hash'])
+        try:
+            with open(path, 'rb') as f:
+                ok = sha256_hex(f.read()) == entries[i]['hash']
+        except FileNotFoundError:
+            ok = False
+        if not ok:
+            bad.append(i)
+    return bad
+
+def sync_store(manifest, src_dir, dst_dir):
+    """Copy the chunk objects a manifest needs that dst_dir is missing"""
+    copied = 0
+    for digest in dict.fromkeys(c['hash'] for c in manifest['chunks']):
+        dst = object_path(dst_dir, digest)
+        if os.path.exists(dst):
+            continue
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        tmp = f'{dst}.{os.getpid()}.tmp'
+        shutil.copyfile(object_path(src_dir, digest), tmp)
+        os.replace(tmp, dst)
+        copied += 1
+    return copied
+
+def checkout(manifest, out_path, store_dir=STORE_DIR):
+    """Reassemble a catalog file from its chunk objects"""
+    tmp = out_path + '.tmp'
+    with open(tmp, 'wb') as out:
+        for c in manifest['chunks']:
+            with open(object_path(store_dir, c['hash']), 'rb') as f:
+                block = f.read()
+            if sha256_hex(block) != c['hash']:
+                raise ValueError(f"Corrupt chunk object {c['hash']}")
+            out.write(block)
+    os.replace(tmp, out_path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--store', default=STORE_DIR, help='chunk object store')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+
+    p = sub.add_parser('add', help='store catalogs and write their manifests')
+    p.add_argument('csv', nargs='+')
+    p.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+
+    p = sub.add_parser('verify', help='check a catalog against its manifest')
+    p.add_argument('csv')
+    p.add_argument('--manifest')
+    p.add_argument('--since', help='only re-hash chunks changed since this manifest')
+
+    p = sub.add_parser('fsck', help='check the store objects a manifest references')
+    p.add_argument('manifest')
+    p.add_argument('--since', help='only check chunks changed since this manifest')
+
+    p = sub.add_parser('diff', help='list chunks changed between two manifests')
+    p.add_argument('old')
+    p.add_argument('new')
+
+    p = sub.add_parser('sync', help='copy missing chunk objects to another store')
+    p.add_argument('manifest')
+    p.add_argument('dest')
+
+    p = sub.add_parser('checkout', help='rebuild a catalog file from the store')
+    p.add_argument('manifest')
+    p.add_argument('out')
+
+    args = parser.parse_args(argv)
+
+    if args.cmd == 'add':
+        for path in args.csv:
+            manifest, n_new = add_catalog(path, args.store, chunk_rows=args.chunk_rows)
+            print(f"{path}: {len(manifest['chunks'])} chunks, {n_new} new, "
+                  f"root {manifest['root'][:16]}")
+        return 0
+
+    if args.cmd == 'verify':
+        manifest = load_manifest(args.manifest or default_manifest_path(args.csv))
+        chunks = None
+        if args.since:
+            chunks = changed_chunks(load_manifest(args.since), manifest)
+        bad = verify_file(args.csv, manifest, chunks)
+        checked = len(manifest['chunks']) if chunks is None else len(set(chunks) | set(bad))
+        if bad:
+            size = os.path.getsize(args.csv)
+            if size != manifest['size']:
+                print(f"{args.csv}: FAILED, size {size:,} bytes, manifest has {manifest['size']:,}")
+            print(f"{args.csv}: FAILED, {len(bad)}/{checked} chunks differ: {bad}")
+            return 1
+        print(f"{args.csv}: OK ({checked} chunks checked)")
+        return 0
+
+    if args.cmd == 'fsck':
+        manifest = load_manifest(args.manifest)
+        chunks = None
+        if args.since:
+            chunks = changed_chunks(load_manifest(args.since), manifest)
+        bad = verify_store(manifest, args.store, chunks)
+        if bad:
+            print(f"{args.store}: {len(bad)} missing or corrupt chunk objects: {bad}")
+            return 1
+        print(f"{args.store}: OK")
+        return 0
+
+    if args.cmd == 'diff':
+        old, new = load_manifest(args.old), load_manifest(args.new)
+        changed = changed_chunks(old, new)
+        print(f"{len(changed)}/{len(new['chunks'])} chunks changed")
+        for i in changed:
+            c = new['chunks'][i]
+            print(f"  chunk {i}: bytes {c['offset']}-{c['offset'] + c['bytes']}, {c['rows']} rows")
+        return 0
+
+    if args.cmd == 'sync':
+        copied = sync_store(load_manifest(args.manifest), args.store, args.dest)
+        print(f"Copied {copied} chunk objects to {args.dest}")
+        return 0
+
+    if args.cmd == 'checkout':
+        checkout(load_manifest(args.manifest), args.out, args.store)
+        print(f"Wrote {args.out}")
+        return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
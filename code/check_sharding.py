@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Check that sharded generation reproduces the unsharded catalog
+
+Each shard is generated by its own `generate_catalog.py --shard i/N`
+process, all running at once as independent nodes would, then the shards
+are merged with merge_shards. The merged file must be byte-identical to a
+single unsharded run for every shard count. Exits non-zero on mismatch.
+
+Usage:
+    python3 check_sharding.py
+    python3 check_sharding.py --n-max 7 --shards 1 3 7 16
+"""
+
+import argparse
+import filecmp
+import os
+import subprocess
+import sys
+import tempfile
+
+from generate_catalog import generate_catalog
+from merge_shards import merge_shards
+
+GENERATOR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'generate_catalog.py')
+
+def run_shards(n_shards, n_max, out_dir):
+    """Generate all shards of one split in parallel processes; return their paths"""
+    paths = [os.path.join(out_dir, f'shard_{n_shards}_{i}.csv') for i in range(n_shards)]
+    procs = [subprocess.Popen([sys.executable, GENERATOR, '--n-max', str(n_max),
+                               '--shard', f'{i}/{n_shards}', '--out', path, '--no-manifest'],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+             for i, path in enumerate(paths)]
+    for i, proc in enumerate(procs):
+        _, err = proc.communicate()
+        if proc.returncode != 0:
+            raise RuntimeError(f"shard {i}/{n_shards} failed:\n{err.decode()}")
+    return paths
+
+def check_sharding(shard_counts=(1, 3, 7), n_max=6):
+    """Returns {shard count: True if the merged catalog matches the reference}"""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        reference = os.path.join(tmp, 'reference.csv')
+        generate_catalog(reference, n_max, manifest=False)
+        for n_shards in shard_counts:
+            merged = os.path.join(tmp, f'merged_{n_shards}.csv')
+            merge_shards(run_shards(n_shards, n_max, tmp), merged, manifest=False)
+            results[n_shards] = filecmp.cmp(reference, merged, shallow=False)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Check sharded generation against an unsharded run')
+    parser.add_argument('--n-max', type=int, default=6)
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 3, 7])
+    args = parser.parse_args()
+
+    results = check_sharding(args.shards, args.n_max)
+    for n_shards, same in results.items():
+        print(f"{n_shards} shard(s): {'identical' if same else 'DIFFERENT'}")
+    sys.exit(0 if all(results.values()) else 1)
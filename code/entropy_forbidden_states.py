@@ -32,6 +32,10 @@ BIND_CC = 0.08  # GeV per cc diquark
 BIND_BB = 0.16  # GeV per bb diquark
 REPULSION = 0.95  # GeV for 4+ heavy quarks
 
+# Decay thresholds (GeV)
+THRESHOLD_CHARM = 3.73  # D-Dbar
+THRESHOLD_LIGHT = 0.28  # pi-pi
+
 def baryon_number(cfg):
     """Calculate baryon number B = (n_quarks - n_antiquarks)/3"""
     n_q = sum(cfg.get(q, 0) for q in QUARKS)
@@ -78,7 +82,7 @@ def evaluate_status(cfg, J):
     mass = total_mass(cfg, J)
     
     # Simple threshold check (simplified for this version)
-    threshold = 3.73 if cfg.get('c', 0) > 0 else 0.28  # D-Dbar or pi-pi
+    threshold = THRESHOLD_CHARM if cfg.get('c', 0) > 0 else THRESHOLD_LIGHT
     dE = mass - threshold
     
     if dE > 0 and n >= 4:
@@ -86,6 +90,82 @@ def evaluate_status(cfg, J):
     
     return 'Allowed', True, True, True, True, dE
 
+# ===== VECTORIZED MODEL =====
+# Same formulas as above over an (N, 10) count matrix whose columns follow
+# ALL_TYPES; operations are ordered so results match the scalar versions bit for bit.
+# Parameters and tables may be passed in explicitly (e.g. from a shared
+# model context); by default they are read from the module constants.
+_COL = {q: i for i, q in enumerate(ALL_TYPES)}
+
+PARAM_NAMES = ['c0', 'aB', 'alphaS', 'betaJ', 'DELTA_S_RG',
+               'BIND_CC', 'BIND_BB', 'REPULSION']
+_P = {name: i for i, name in enumerate(PARAM_NAMES)}
+
+def default_params():
+    """Current model parameters as a float64 vector in PARAM_NAMES order"""
+    values = dict(ENTROPY_COEFF, DELTA_S_RG=DELTA_S_RG, BIND_CC=BIND_CC,
+                  BIND_BB=BIND_BB, REPULSION=REPULSION)
+    return np.array([values[name] for name in PARAM_NAMES], dtype=np.float64)
+
+def default_tables():
+    """Per-flavour heavy masses (ALL_TYPES order) and thresholds indexed by has-charm"""
+    return {
+        'heavy_mass': np.array([HEAVY_MASS.get(q, 0.0) for q in ALL_TYPES]),
+        'threshold': np.array([THRESHOLD_LIGHT, THRESHOLD_CHARM]),
+    }
+
+def quantum_numbers_array(counts):
+    """n, B and S arrays for a count matrix"""
+    counts = np.asarray(counts)
+    n_q = counts[:, :len(QUARKS)].sum(axis=1)
+    n_qbar = counts[:, len(QUARKS):].sum(axis=1)
+    B = (n_q - n_qbar) / 3
+    S = -(counts[:, _COL['s']] - counts[:, _COL['s_bar']])
+    return n_q + n_qbar, B, S
+
+def total_mass_array(counts, J, params=None, tables=None):
+    """Vectorized total_mass; params/tables default to the module constants"""
+    p = default_params() if params is None else params
+    heavy_mass = (default_tables() if tables is None else tables)['heavy_mass']
+    counts = np.asarray(counts, dtype=np.int64)
+    J = np.asarray(J, dtype=np.float64)
+    _, B, S = quantum_numbers_array(counts)
+    F = p[_P['c0']] + p[_P['aB']]*B + \
+        p[_P['alphaS']]*np.abs(S) + p[_P['betaJ']]*J
+    m_entropy = p[_P['DELTA_S_RG']] * F / 1000
+
+    m_heavy = np.zeros(len(counts))
+    for q in ['c', 'b', 'c_bar', 'b_bar']:
+        m_heavy = m_heavy + counts[:, _COL[q]] * heavy_mass[_COL[q]]
+
+    n_heavy = counts[:, [_COL[q] for q in ['c', 'c_bar', 'b', 'b_bar']]].sum(axis=1)
+    repulsion = np.where(n_heavy >= 4, p[_P['REPULSION']], 0)
+
+    n_cc = counts[:, _COL['c']] // 2
+    n_bb = counts[:, _COL['b']] // 2
+    binding = n_cc * p[_P['BIND_CC']] + n_bb * p[_P['BIND_BB']]
+
+    return m_entropy + m_heavy + repulsion - binding
+
+def evaluate_status_array(counts, J, params=None, tables=None):
+    """
+    Vectorized evaluate_status: (status labels, mass, threshold, dE) arrays.
+    params is a vector in PARAM_NAMES order and tables a dict like
+    default_tables(); both default to the module constants.
+    """
+    tables = default_tables() if tables is None else tables
+    counts = np.asarray(counts, dtype=np.int64)
+    n, B, _ = quantum_numbers_array(counts)
+    mass = total_mass_array(counts, J, params, tables)
+    threshold = tables['threshold'][(counts[:, _COL['c']] > 0).astype(np.intp)]
+    dE = mass - threshold
+
+    gauge = n < 3 * np.abs(B)
+    energy = ~gauge & (dE > 0) & (n >= 4)
+    status = np.where(gauge, 'Gauge', np.where(energy, 'Energy', 'Allowed')).astype(object)
+    dE = np.where(gauge, 0.0, dE)
+    return status, mass, threshold, dE
+
 # Simple test
 if __name__ == "__main__":
     print("Entropy Forbidden States Framework")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Generate the forbidden-states catalog
+
+Enumerates every quark/antiquark configuration with n_min <= n <= n_max
+constituents, couples their spins to the physically allowed J values and
+scores each (configuration, J) row with evaluate_status.
+
+Large catalogs can be split across machines: each configuration belongs
+to exactly one of N shards (by a hash of its packed key), every shard
+file is written in packed-key order, and merge_shards.py combines them.
+
+Usage:
+    python3 generate_catalog.py --n-max 6 --out forbidden_states_catalog.csv
+    python3 generate_catalog.py --n-max 10 --shard 3/16 --out shard_03.csv
+"""
+
+import argparse
+import itertools
+
+from catalog_keys import FLAVORS, counts_to_cfg, flavor_counts, key_bucket, pack_keys
+from catalog_store import add_catalog
+from entropy_forbidden_states import baryon_number, evaluate_status, strangeness
+from spin_coupling import coupled_spins
+
+CATALOG_COLUMNS = ['quarks', 'B', 'S', 'J', 'status', 'dE', 'multiplicity']
+
+def iter_configurations(n_max, n_min=2):
+    """Quark strings in catalog order: by n, then combinations over FLAVORS"""
+    for n in range(n_min, n_max + 1):
+        for combo in itertools.combinations_with_replacement(FLAVORS, n):
+            yield ''.join(combo)
+
+def shard_configurations(configurations, shard, n_shards, batch=4096):
+    """Keep the configurations that belong to shard `shard` of `n_shards`"""
+    it = iter(configurations)
+    while True:
+        chunk = list(itertools.islice(it, batch))
+        if not chunk:
+            return
+        buckets = key_bucket(pack_keys(chunk, [0] * len(chunk)), n_shards)
+        yield from (q for q, b in zip(chunk, buckets) if b == shard)
+
+def parse_shard(text):
+    """'i/N' -> (i, N) with 0 <= i < N"""
+    try:
+        i, n = (int(x) for x in text.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N, got {text!r}")
+    if not 0 <= i < n:
+        raise argparse.ArgumentTypeError(f"shard index must satisfy 0 <= i < N, got {text!r}")
+    return i, n
+
+def catalog_rows(quarks, L=0):
+    """Scored rows for one configuration, one per allowed J"""
+    cfg = counts_to_cfg(flavor_counts(quarks))
+    B = baryon_number(cfg)
+    S = strangeness(cfg)
+    rows = []
+    for two_j, mult in coupled_spins(len(quarks), L):
+        J = two_j / 2
+        status, *_, dE = evaluate_status(cfg, J)
+        rows.append((quarks, B, S, J, status, dE, mult))
+    return rows
+
+def format_row(row):
+    quarks, B, S, J, status, dE, mult = row
+    return f'{quarks},{B!r},{S},{J!r},{status},{float(dE)!r},{mult}\n'
+
+def write_catalog(out_csv, configurations, L=0):
+    """Write scored rows for the given configurations; returns row count"""
+    n_rows = 0
+    with open(out_csv, 'w') as f:
+        f.write(','.join(CATALOG_COLUMNS) + '\n')
+        for quarks in configurations:
+            rows = catalog_rows(quarks, L)
+            f.writelines(format_row(r) for r in rows)
+            n_rows += len(rows)
+    return n_rows
+
+def generate_catalog(out_csv='forbidden_states_catalog.csv', n_max=6, n_min=2,
+                     L=0, manifest=True, shard=None):
+    """
+    Generate a catalog, or one (i, N) shard of it. Full catalogs are
+    stored with a manifest by default; shards are left for merge_shards.
+    """
+    configurations = iter_configurations(n_max, n_min)
+    if shard is not None:
+        configurations = shard_configurations(configurations, *shard)
+    n_rows = write_catalog(out_csv, configurations, L)
+    if manifest and shard is None:
+        add_catalog(out_csv)
+    return n_rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate the forbidden-states catalog')
+    parser.add_argument('--n-max', type=int, default=6)
+    parser.add_argument('--n-min', type=int, default=2)
+    parser.add_argument('--L', type=int, default=0, help='orbital angular momentum')
+    parser.add_argument('--out', default='forbidden_states_catalog.csv')
+    parser.add_argument('--shard', type=parse_shard,
+                        help='generate only shard i of N, e.g. 3/16')
+    parser.add_argument('--no-manifest', action='store_true',
+                        help='skip writing to the chunk store')
+    args = parser.parse_args()
+
+    n_rows = generate_catalog(args.out, args.n_max, args.n_min, args.L,
+                              manifest=not args.no_manifest, shard=args.shard)
+    print(f"Wrote {n_rows:,} rows to {args.out}")
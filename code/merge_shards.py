@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Merge sorted catalog shards into one catalog
+
+Each shard produced by `generate_catalog.py --shard i/N` is already in
+packed-key order, so a streaming k-way merge yields the full catalog in
+generation order. Rows with the same key are kept once; the merged file
+is byte-identical to an unsharded run for any shard count.
+
+Usage:
+    python3 merge_shards.py shard_*.csv --out forbidden_states_catalog.csv
+"""
+
+import argparse
+import heapq
+
+from catalog_keys import pack_key
+from catalog_store import add_catalog
+
+def _keyed_rows(path, header):
+    """Yield (packed key, line) for a shard, checking header and order"""
+    with open(path) as f:
+        shard_header = f.readline()
+        if shard_header != header:
+            raise ValueError(f"{path}: header {shard_header.strip()!r} does not match {header.strip()!r}")
+        prev = -1
+        for line in f:
+            quarks, _, _, J, _ = line.split(',', 4)
+            key = pack_key(quarks, float(J))
+            if key < prev:
+                raise ValueError(f"{path}: rows are not in packed-key order at {quarks} J={J}")
+            prev = key
+            yield key, line
+
+def merge_shards(shard_paths, out_csv, manifest=True):
+    """
+    k-way merge of sorted shards into out_csv. Returns (rows written,
+    duplicate rows dropped). Conflicting rows for one key raise ValueError.
+    """
+    with open(shard_paths[0]) as f:
+        header = f.readline()
+
+    written = 0
+    dropped = 0
+    prev_key, prev_line = None, None
+    streams = [_keyed_rows(path, header) for path in shard_paths]
+    with open(out_csv, 'w') as out:
+        out.write(header)
+        for key, line in heapq.merge(*streams, key=lambda kv: kv[0]):
+            if key == prev_key:
+                if line != prev_line:
+                    raise ValueError(f"Conflicting rows for the same key:\n  {prev_line}  {line}")
+                dropped += 1
+                continue
+            out.write(line)
+            written += 1
+            prev_key, prev_line = key, line
+
+    if manifest:
+        add_catalog(out_csv)
+    return written, dropped
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Merge sorted catalog shards')
+    parser.add_argument('shards', nargs='+')
+    parser.add_argument('--out', default='forbidden_states_catalog.csv')
+    parser.add_argument('--no-manifest', action='store_true',
+                        help='skip writing to the chunk store')
+    args = parser.parse_args()
+
+    written, dropped = merge_shards(args.shards, args.out, manifest=not args.no_manifest)
+    print(f"Merged {len(args.shards)} shards into {args.out}: {written:,} rows"
+          + (f", {dropped:,} duplicates dropped" if dropped else ""))
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Shared model context for process pools
+
+Everything a worker needs to score configurations (model parameter
+vector, per-flavour heavy masses, threshold table, spin multiplicity
+table and the packed catalog arrays) is written once into a single
+shared-memory segment. Scoring itself is evaluate_status_array, fed the
+shared parameters and tables; the multiplicity table gives each scored
+row its number of independent spin multiplets. The model has no colour
+singlet or Pauli table to share: those checks are computed per row
+inside evaluate_status_array. Workers attach to the segment by name and
+read numpy views of it, so nothing is copied or rebuilt per process.
+Pickling a context sends only the segment name and layout.
+
+Lifecycle: the publishing process owns the segment and unlinks it on
+exit from the `with` block (or at interpreter exit if it was never
+closed). Attached processes only close their mapping. Array views must
+not outlive the context that produced them.
+
+Usage:
+    python3 model_context.py --workers 4
+    python3 model_context.py --catalog ../data/forbidden_states_catalog.csv --workers 8
+"""
+
+import argparse
+import os
+import sys
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+import entropy_forbidden_states as model
+from catalog_keys import (STATUSES, count_matrix, pack_counts, pack_keys,
+                          status_codes, unpack_counts)
+from generate_catalog import iter_configurations
+from spin_coupling import coupled_spins
+
+N_MAX = 6
+BLOCK_ROWS = 16384
+ALIGN = 64
+
+# Segments attached in this process, by name (see _attach)
+_ATTACHED = {}
+
+class SharedArrays:
+    """Named numpy arrays packed into one shared-memory segment"""
+
+    def __init__(self, shm, layout, owner):
+        self._shm = shm
+        self.layout = layout
+        self.owner = owner
+        self._arrays = {}
+        for name, (offset, dtype, shape) in layout.items():
+            arr = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            self._arrays[name] = arr
+        # Owner unlinks at interpreter exit if nobody did it explicitly
+        self._finalizer = weakref.finalize(self, shm.unlink) if owner else None
+
+    @classmethod
+    def create(cls, arrays):
+        """Publish a {name: array} dict into a new segment owned by this process"""
+        layout, size = {}, 0
+        for name, arr in arrays.items():
+            arr = np.asarray(arr)
+            size = -(-size // ALIGN) * ALIGN
+            layout[name] = (size, arr.dtype.str, arr.shape)
+            size += arr.nbytes
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        shared = cls(shm, layout, owner=True)
+        for name, arr in arrays.items():
+            shared._arrays[name][...] = arr
+        return shared
+
+    @classmethod
+    def attach(cls, spec):
+        """Attach to a segment published by another process"""
+        name, layout = spec
+        return cls(shared_memory.SharedMemory(name=name), layout, owner=False)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @property
+    def spec(self):
+        """Picklable (segment name, layout) pair"""
+        return self._shm.name, self.layout
+
+    @property
+    def nbytes(self):
+        return self._shm.size
+
+    def __getitem__(self, name):
+        return self._arrays[name]
+
+    def __contains__(self, name):
+        return name in self._arrays
+
+    def __reduce__(self):
+        return _attach, (type(self), self.spec)
+
+    def __repr__(self):
+        role = 'owner' if self.owner else 'attached'
+        return f"<{type(self).__name__} {self.name} {self.nbytes:,} bytes, {role}>"
+
+    def close(self):
+        """Drop this process's views and mapping"""
+        if self._shm is None:
+            return
+        self._arrays = {}
+        self._shm.close()
+        _ATTACHED.pop(self._shm.name, None)
+
+    def unlink(self):
+        """Remove the segment (owner only); attached mappings stay valid until closed"""
+        if self._finalizer is not None and self._finalizer.alive:
+            self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        self.unlink()
+        self._shm = None
+
+def _attach(cls, spec):
+    """Unpickle hook: attach once per process and reuse the mapping"""
+    name = spec[0]
+    if name not in _ATTACHED:
+        _ATTACHED[name] = cls.attach(spec)
+    return _ATTACHED[name]
+
+def lookup_tables(n_max=N_MAX, params=None):
+    """Parameter vector, the model's default tables and the spin multiplicity table"""
+    p = model.default_params()
+    for name, value in (params or {}).items():
+        p[model.PARAM_NAMES.index(name)] = value
+
+    # Independent spin multiplets, indexed by (n, 2J)
+    multiplicity = np.zeros((n_max + 1, n_max + 1), dtype=np.int32)
+    for n in range(n_max + 1):
+        for two_j, mult in coupled_spins(n):
+            multiplicity[n, two_j] = mult
+
+    return {'params': p, **model.default_tables(), 'multiplicity': multiplicity}
+
+def catalog_arrays(catalog=None, n_max=N_MAX):
+    """Packed catalog rows: key, flavour counts (uint8) and 2J, plus status/dE from a CSV"""
+    if catalog is not None:
+        df = pd.read_csv(catalog, usecols=['quarks', 'J', 'status', 'dE'])
+        key = pack_keys(df['quarks'].to_numpy(), df['J'].to_numpy())
+        counts, two_j = unpack_counts(key)
+        return {'key': key, 'counts': counts.astype(np.uint8), 'two_j': two_j.astype(np.uint8),
+                'status': status_codes(df['status'].to_numpy()),
+                'dE': df['dE'].to_numpy(dtype=np.float64)}
+
+    configs = count_matrix(list(iter_configurations(n_max)))
+    n = configs.sum(axis=1)
+    n_j = np.array([len(coupled_spins(m)) for m in range(n_max + 1)])[n]
+    counts = np.repeat(configs, n_j, axis=0)
+    two_j = np.concatenate([[tj for tj, _ in coupled_spins(m)] for m in n])
+    return {'key': pack_counts(counts, two_j), 'counts': counts.astype(np.uint8),
+            'two_j': two_j.astype(np.uint8)}
+
+class ModelContext(SharedArrays):
+    """Model parameters, lookup tables and catalog arrays in shared memory"""
+
+    @classmethod
+    def publish(cls, catalog=None, n_max=N_MAX, params=None):
+        """
+        Build the tables once and publish them. params overrides entries
+        of model.PARAM_NAMES, e.g. {'REPULSION': 0.9} for a parameter scan.
+        """
+        rows = catalog_arrays(catalog, n_max)
+        n_max = max(n_max, int(rows['counts'].sum(axis=1).max(initial=0)))
+        arrays = lookup_tables(n_max, params)
+        arrays.update(rows)
+        ctx = cls.create(arrays)
+        for arr in ctx._arrays.values():
+            arr.flags.writeable = False
+        return ctx
+
+    @classmethod
+    def attach(cls, spec):
+        ctx = super().attach(spec)
+        for arr in ctx._arrays.values():
+            arr.flags.writeable = False
+        return ctx
+
+    @property
+    def params(self):
+        return dict(zip(model.PARAM_NAMES, self['params'].tolist()))
+
+    def __len__(self):
+        return len(self['key'])
+
+    def evaluate(self, counts, two_j):
+        """
+        evaluate_status_array with the shared parameters and tables.
+        Returns (status code, mass, threshold, dE).
+        """
+        tables = {name: self[name] for name in model.default_tables()}
+        status, mass, threshold, dE = model.evaluate_status_array(
+            counts, np.asarray(two_j, dtype=np.int64) / 2, self['params'], tables)
+        return status_codes(status), mass, threshold, dE
+
+def _score_block(ctx, out, start, stop):
+    """Worker task: score catalog rows [start, stop) into the shared output"""
+    counts, two_j = ctx['counts'][start:stop], ctx['two_j'][start:stop]
+    status, mass, _, dE = ctx.evaluate(counts, two_j)
+    out['status'][start:stop] = status
+    out['mass'][start:stop] = mass
+    out['dE'][start:stop] = dE
+    out['multiplicity'][start:stop] = ctx['multiplicity'][counts.sum(axis=1), two_j]
+    return stop - start
+
+def score_catalog(ctx, workers=None, block_rows=BLOCK_ROWS):
+    """
+    Score every catalog row of ctx across a process pool. Workers read
+    the context and write disjoint slices of a shared output segment;
+    returns {'status', 'mass', 'dE', 'multiplicity'} arrays owned by the
+    caller.
+    """
+    n_rows = len(ctx)
+    out = SharedArrays.create({'status': np.zeros(n_rows, dtype=np.int8),
+                               'mass': np.zeros(n_rows), 'dE': np.zeros(n_rows),
+                               'multiplicity': np.zeros(n_rows, dtype=np.int32)})
+    with out:
+        blocks = [(start, min(start + block_rows, n_rows))
+                  for start in range(0, n_rows, block_rows)]
+        workers = workers or min(len(blocks), os.cpu_count() or 1)
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_score_block, ctx, out, start, stop)
+                           for start, stop in blocks]
+                for future in futures:
+                    future.result()
+        else:
+            for start, stop in blocks:
+                _score_block(ctx, out, start, stop)
+        result = {name: out[name].copy() for name in ('status', 'mass', 'dE', 'multiplicity')}
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Score the catalog from a shared model context')
+    parser.add_argument('--catalog', help='catalog CSV (default: generate configurations)')
+    parser.add_argument('--n-max', type=int, default=N_MAX)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--check', action='store_true',
+                        help='compare against evaluate_status_array in this process')
+    args = parser.parse_args()
+
+    with ModelContext.publish(args.catalog, args.n_max) as ctx:
+        print(f"Published {len(ctx):,} rows, {ctx.nbytes / 1e6:.1f} MB in {ctx.name}")
+        start = time.perf_counter()
+        result = score_catalog(ctx, args.workers)
+        elapsed = time.perf_counter() - start
+        print(f"Scored in {elapsed:.2f} s ({len(ctx) / elapsed:,.0f} rows/s)")
+        counts = np.bincount(result['status'], minlength=len(STATUSES))
+        print(', '.join(f"{s}: {c:,}" for s, c in zip(STATUSES, counts)))
+
+        if args.check:
+            status, mass, _, dE = model.evaluate_status_array(ctx['counts'].astype(np.int64),
+                                                             ctx['two_j'] / 2)
+            same = (np.array_equal(status_codes(status), result['status'])
+                    and np.array_equal(mass, result['mass']) and np.array_equal(dE, result['dE']))
+            print("Matches evaluate_status_array" if same else "MISMATCH with evaluate_status_array")
+            if not same:
+                sys.exit(1)
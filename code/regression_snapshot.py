@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Regression snapshots of model outputs
+
+Records the full generated catalog (packed key, status, dE,
+multiplicity), the same configurations scored through the shared-memory
+model context in worker processes (status, mass, dE, multiplicity) and
+the known-exotic predictions (status, mass, threshold, dE) in one
+compressed .npz file, then compares a later run against it column by
+column with per-column tolerances. Default tolerance is zero, i.e.
+results must be bit-identical.
+
+Usage:
+    python3 regression_snapshot.py record ../data/model_snapshot.npz
+    python3 regression_snapshot.py check ../data/model_snapshot.npz
+    python3 regression_snapshot.py check ../data/model_snapshot.npz --catalog new.csv --tol dE=1e-9
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from catalog_keys import count_matrix, pack_keys, status_codes, unpack_key
+from entropy_forbidden_states import evaluate_status_array
+from generate_catalog import catalog_rows, iter_configurations
+from model_context import ModelContext, score_catalog
+from validate_known_exotics import known_exotics_table
+
+N_MAX = 6
+CONTEXT_WORKERS = 2  # exercise the pool path even on one core
+
+def catalog_table(catalog=None, n_max=N_MAX):
+    """Catalog columns from a CSV file, or freshly generated by the model"""
+    if catalog is not None:
+        df = pd.read_csv(catalog)
+    else:
+        rows = [r for q in iter_configurations(n_max) for r in catalog_rows(q)]
+        df = pd.DataFrame(rows, columns=['quarks', 'B', 'S', 'J', 'status', 'dE', 'multiplicity'])
+    table = {
+        'key': pack_keys(df['quarks'].to_numpy(), df['J'].to_numpy()),
+        'status': status_codes(df['status'].to_numpy()),
+        'dE': df['dE'].to_numpy(dtype=np.float64),
+    }
+    if 'multiplicity' in df.columns:
+        table['multiplicity'] = df['multiplicity'].to_numpy(dtype=np.int64)
+    return table
+
+def exotics_table():
+    """Unrounded model predictions for KNOWN_EXOTICS"""
+    ref = known_exotics_table()
+    status, mass, threshold, dE = evaluate_status_array(
+        count_matrix(ref['content'].to_numpy()), ref['J'].to_numpy(dtype=np.float64))
+    return {
+        'key': ref['name'].to_numpy().astype(str),
+        'status': status_codes(status),
+        'mass': mass,
+        'threshold': threshold,
+        'dE': dE,
+    }
+
+def context_table(n_max=N_MAX, workers=CONTEXT_WORKERS):
+    """Generated configurations scored via ModelContext in a process pool"""
+    with ModelContext.publish(n_max=n_max) as ctx:
+        key = ctx['key'].copy()
+        result = score_catalog(ctx, workers, block_rows=max(1, len(key) // (2 * workers)))
+    return {'key': key, **result}
+
+def collect(catalog=None, n_max=N_MAX):
+    return {'catalog': catalog_table(catalog, n_max), 'context': context_table(n_max),
+            'exotics': exotics_table()}
+
+def save_snapshot(path, tables):
+    arrays = {f'{t}/{c}': v for t, cols in tables.items() for c, v in cols.items()}
+    np.savez_compressed(path, **arrays)
+
+def load_snapshot(path):
+    tables = {}
+    with np.load(path) as npz:
+        for name in npz.files:
+            table, col = name.split('/', 1)
+            tables.setdefault(table, {})[col] = npz[name]
+    return tables
+
+def _describe(keys):
+    """Readable labels for example keys (packed catalog keys are unpacked)"""
+    if keys.dtype.kind in 'iu':
+        return ['{} J={}'.format(*unpack_key(k)) for k in keys]
+    return keys.tolist()
+
+def _align(old_key, new_key):
+    """Index arrays pairing equal keys, plus keys only in old / only in new"""
+    if len(old_key) == len(new_key) and np.array_equal(old_key, new_key):
+        idx = np.arange(len(old_key))
+        return idx, idx, old_key[:0], new_key[:0]
+    _, i_old, i_new = np.intersect1d(old_key, new_key, return_indices=True)
+    removed = np.setdiff1d(old_key, new_key)
+    added = np.setdiff1d(new_key, old_key)
+    return i_old, i_new, removed, added
+
+def compare_tables(old, new, tolerances=None, max_examples=5):
+    """
+    Compare snapshot tables. tolerances maps column -> absolute tolerance
+    (0 by default). Returns a list of difference records; empty if equal.
+    """
+    tolerances = tolerances or {}
+    diffs = []
+    for table in sorted(set(old) | set(new)):
+        if table not in old or table not in new:
+            diffs.append({'table': table, 'column': '*',
+                          'detail': 'missing in ' + ('old' if table not in old else 'new')})
+            continue
+        i_old, i_new, removed, added = _align(old[table]['key'], new[table]['key'])
+        if len(removed) or len(added):
+            diffs.append({'table': table, 'column': 'key', 'removed': len(removed),
+                          'added': len(added),
+                          'examples': _describe(removed[:max_examples]) + _describe(added[:max_examples])})
+
+        for col in sorted((set(old[table]) | set(new[table])) - {'key'}):
+            if col not in old[table] or col not in new[table]:
+                diffs.append({'table': table, 'column': col,
+                              'detail': 'missing in ' + ('old' if col not in old[table] else 'new')})
+                continue
+            a = old[table][col][i_old]
+            b = new[table][col][i_new]
+            nan_mismatch = 0
+            if a.dtype.kind == 'f' or b.dtype.kind == 'f':
+                a, b = a.astype(np.float64), b.astype(np.float64)
+                delta = np.abs(a - b)
+                # NaN on exactly one side never passes and has no finite difference
+                one_nan = np.isnan(a) != np.isnan(b)
+                bad = one_nan | ~((delta <= tolerances.get(col, 0.0)) | (np.isnan(a) & np.isnan(b)))
+                finite_bad = bad & ~one_nan
+                max_delta = float(delta[finite_bad].max()) if finite_bad.any() else 0.0
+                nan_mismatch = int(one_nan.sum())
+            else:
+                bad = a != b
+                max_delta = None
+            if bad.any():
+                keys = new[table]['key'][i_new][bad]
+                diffs.append({'table': table, 'column': col, 'changed': int(bad.sum()),
+                              'of': len(bad), 'max_abs_diff': max_delta,
+                              'nan_mismatch': nan_mismatch,
+                              'examples': _describe(keys[:max_examples])})
+    return diffs
+
+def format_diffs(diffs):
+    lines = []
+    for d in diffs:
+        where = f"{d['table']}.{d['column']}"
+        if 'detail' in d:
+            lines.append(f"{where}: {d['detail']}")
+        elif d['column'] == 'key':
+            lines.append(f"{where}: {d['removed']} removed, {d['added']} added "
+                         f"(e.g. {d['examples']})")
+        else:
+            size = ''
+            if d['max_abs_diff'] is not None and d['changed'] > d['nan_mismatch']:
+                size = f", max |diff| {d['max_abs_diff']:.3g}"
+            if d['nan_mismatch']:
+                size += f", {d['nan_mismatch']} NaN vs number"
+            lines.append(f"{where}: {d['changed']}/{d['of']} differ{size} (e.g. {d['examples']})")
+    return '\n'.join(lines)
+
+def parse_tol(items):
+    tolerances = {}
+    for item in items or []:
+        col, _, value = item.partition('=')
+        tolerances[col] = float(value)
+    return tolerances
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Record or check model output snapshots')
+    parser.add_argument('action', choices=['record', 'check'])
+    parser.add_argument('snapshot')
+    parser.add_argument('--catalog', help='use this catalog CSV instead of generating one')
+    parser.add_argument('--n-max', type=int, default=N_MAX)
+    parser.add_argument('--tol', action='append', metavar='COLUMN=ATOL',
+                        help='absolute tolerance for a column (repeatable)')
+    args = parser.parse_args()
+
+    tables = collect(args.catalog, args.n_max)
+    if args.action == 'record':
+        save_snapshot(args.snapshot, tables)
+        sizes = ', '.join(f"{t}: {len(c['key']):,} rows" for t, c in tables.items())
+        print(f"Recorded {args.snapshot} ({sizes})")
+        sys.exit(0)
+
+    diffs = compare_tables(load_snapshot(args.snapshot), tables, parse_tol(args.tol))
+    if diffs:
+        print(f"Snapshot mismatch against {args.snapshot}:")
+        print(format_diffs(diffs))
+        sys.exit(1)
+    print(f"Outputs match {args.snapshot}")
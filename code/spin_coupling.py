@@ -0,0 +1,49 @@
+"""
+Angular-momentum coupling tables for multiquark configurations
+
+n spin-1/2 constituents couple to total spin S with a known number of
+independent multiplets; adding an orbital L then gives the allowed J.
+Tables are memoized per (n, L) and shared by every configuration with
+the same constituent count, so generation never recurses per row.
+All spins are handled as integers 2S, 2J to stay exact.
+"""
+
+from functools import lru_cache
+
+@lru_cache(maxsize=None)
+def spin_table(n):
+    """{2S: multiplicity} for n spin-1/2 constituents"""
+    if n == 0:
+        return {0: 1}
+    table = {}
+    for two_s, mult in spin_table(n - 1).items():
+        for two_s_new in (two_s - 1, two_s + 1):
+            if two_s_new >= 0:
+                table[two_s_new] = table.get(two_s_new, 0) + mult
+    return table
+
+@lru_cache(maxsize=None)
+def coupled_spins(n, L=0):
+    """
+    Sorted tuple of (2J, multiplicity) for n spin-1/2 constituents with
+    orbital angular momentum L. Multiplicity counts independent spin-J
+    multiplets; each has 2J+1 states.
+    """
+    two_l = 2 * L
+    table = {}
+    for two_s, mult in spin_table(n).items():
+        for two_j in range(abs(two_l - two_s), two_l + two_s + 1, 2):
+            table[two_j] = table.get(two_j, 0) + mult
+    return tuple(sorted(table.items()))
+
+def allowed_J(n, L=0):
+    """Allowed total J values for n constituents"""
+    return tuple(two_j / 2 for two_j, _ in coupled_spins(n, L))
+
+def multiplicity(n, J, L=0):
+    """Number of independent spin-J multiplets (0 if J cannot be reached)"""
+    return dict(coupled_spins(n, L)).get(int(round(2 * J)), 0)
+
+def degeneracy(n, J, L=0):
+    """Number of states with total J: multiplicity x (2J+1)"""
+    return multiplicity(n, J, L) * (int(round(2 * J)) + 1)
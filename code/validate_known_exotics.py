@@ -1,9 +1,24 @@
 #!/usr/bin/env python3
 """
 Validate entropy-forbidden framework against known exotic hadrons
+
+Reference tables (CSV or JSON) list one state per row with columns
+name, content, J, mass and optionally sigma (all masses in GeV). Content
+uses catalog letters: lower case quarks, upper case antiquarks. Every
+row is scored in one vectorized pass.
+
+Usage:
+    python3 validate_known_exotics.py
+    python3 validate_known_exotics.py lattice_predictions.csv --model-sigma 0.1
 """
 
+import argparse
+import json
+import os
+
 from entropy_forbidden_states import *
+from catalog_keys import TYPE_NAMES, count_matrix
+import numpy as np
 import pandas as pd
 
 # Known exotic hadrons
@@ -15,7 +30,7 @@ KNOWN_EXOTICS = {
     'Pc(4312)': {'quarks': 'ccuud', 'mass': 4.312, 'J': 0.5},
     'Pc(4440)': {'quarks': 'ccuud', 'mass': 4.440, 'J': 0.5},
     'Pc(4457)': {'quarks': 'ccuud', 'mass': 4.457, 'J': 0.5},
-    
+
     # Add remaining 17 exotic hadrons here...
     # Tetraquarks
     'Zc(4430)': {'quarks': 'ccUD', 'mass': 4.430, 'J': 1},
@@ -24,50 +39,143 @@ KNOWN_EXOTICS = {
     # etc...
 }
 
-def validate_all():
-    results = []
-    for name, data in KNOWN_EXOTICS.items():
-        # Parse quark content
-        cfg = dict.fromkeys(ALL_TYPES, 0)
-        for ch in data['quarks']:
-            if ch.islower():
-                cfg[ch] += 1
-            else:
-                cfg[ch.lower() + '_bar'] += 1
-        
-        # Set quantum numbers
-        cfg['n'] = sum(cfg.values())
-        cfg['B'] = baryon_number(cfg)
-        cfg['S'] = strangeness(cfg)
-        
-        # Evaluate
-        J = data['J']
-        status, g, e, w, p, dE = evaluate_status(cfg, J)
-        M_pred = total_mass(cfg, J)
-        
-        results.append({
-            'name': name,
-            'quarks': data['quarks'],
-            'status': status,
-            'M_pred': round(M_pred, 3),
-            'M_obs': data['mass'],
-            'delta_M': round(M_pred - data['mass'], 3),
-            'dE': round(dE, 3),
-            'nature': 'Threshold' if dE > 0 else 'Bound'
-        })
-    
-    return pd.DataFrame(results)
+REFERENCE_COLUMNS = ['name', 'content', 'J', 'mass', 'sigma']
+
+SECTOR_ORDER = ['light', 'charm', 'bottom', 'charm+bottom']
+
+def load_reference(path):
+    """Load a reference table from CSV or JSON (list of records)"""
+    if path.endswith('.json'):
+        with open(path) as f:
+            ref = pd.DataFrame(json.load(f))
+    else:
+        ref = pd.read_csv(path)
+
+    ref = ref.rename(columns={'quarks': 'content', 'M_obs': 'mass', 'error': 'sigma'})
+    missing = [c for c in ['name', 'content', 'J', 'mass'] if c not in ref.columns]
+    if missing:
+        raise ValueError(f"{path}: missing columns {missing}")
+    if 'sigma' not in ref.columns:
+        ref['sigma'] = np.nan
+    return ref[REFERENCE_COLUMNS]
+
+def known_exotics_table():
+    """KNOWN_EXOTICS as a reference table"""
+    return pd.DataFrame([
+        {'name': name, 'content': d['quarks'], 'J': d['J'],
+         'mass': d['mass'], 'sigma': d.get('sigma', np.nan)}
+        for name, d in KNOWN_EXOTICS.items()
+    ], columns=REFERENCE_COLUMNS)
+
+def sector_labels(counts):
+    """Heavy-flavour sector of each configuration"""
+    col = {q: i for i, q in enumerate(TYPE_NAMES)}
+    has_c = (counts[:, col['c']] + counts[:, col['c_bar']]) > 0
+    has_b = (counts[:, col['b']] + counts[:, col['b_bar']]) > 0
+    return np.array(SECTOR_ORDER, dtype=object)[has_c + 2 * has_b]
+
+def validate_table(ref, model_sigma=0.0):
+    """
+    Score a reference table in one batch. Pulls use
+    sqrt(sigma^2 + model_sigma^2), with a missing sigma counted as zero
+    in that sum only; rows with zero total uncertainty get a NaN pull and
+    are left out of chi^2. The output `sigma` column is the reference
+    sigma as given (NaN where unknown); `total_sigma` is the quadrature sum.
+    """
+    counts = count_matrix(ref['content'].to_numpy())
+    J = ref['J'].to_numpy(dtype=np.float64)
+    status, M_pred, threshold, dE = evaluate_status_array(counts, J)
+
+    M_obs = ref['mass'].to_numpy(dtype=np.float64)
+    sigma = ref['sigma'].to_numpy(dtype=np.float64)
+    total_sigma = np.hypot(np.nan_to_num(sigma), model_sigma)
+    delta_M = M_pred - M_obs
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pull = np.where(total_sigma > 0, delta_M / total_sigma, np.nan)
+
+    return pd.DataFrame({
+        'name': ref['name'].to_numpy(),
+        'quarks': ref['content'].to_numpy(),
+        'J': J,
+        'n': counts.sum(axis=1),
+        'sector': sector_labels(counts),
+        'status': status,
+        'M_pred': M_pred.round(3),
+        'M_obs': M_obs,
+        'sigma': sigma,
+        'total_sigma': total_sigma,
+        'delta_M': delta_M.round(3),
+        'pull': pull,
+        'threshold': threshold,
+        'dE': dE.round(3),
+        'nature': np.where(dE > 0, 'Threshold', 'Bound'),
+    })
+
+def summarize(results, by=('sector', 'n')):
+    """Per-sector counts, pass rate, mean/RMS pull and chi^2"""
+    df = results.assign(
+        allowed=(results['status'] == 'Allowed'),
+        is_threshold=(results['nature'] == 'Threshold'),
+        pull2=results['pull'] ** 2,
+        has_pull=results['pull'].notna(),
+    )
+    grouped = df.groupby(list(by))
+    summary = pd.DataFrame({
+        'states': grouped.size(),
+        'allowed': grouped['allowed'].sum(),
+        'threshold': grouped['is_threshold'].sum(),
+        'mean_delta_M': grouped['delta_M'].mean(),
+        'mean_pull': grouped['pull'].mean(),
+        'rms_pull': np.sqrt(grouped['pull2'].mean()),
+        'chi2': grouped['pull2'].sum(),
+        'ndf': grouped['has_pull'].sum(),
+    })
+    return summary.reset_index()
+
+def chi2(results):
+    """Total chi^2 and number of rows with a defined pull"""
+    pull = results['pull'].to_numpy()
+    ok = ~np.isnan(pull)
+    return float((pull[ok] ** 2).sum()), int(ok.sum())
+
+def pull_histogram(results, bins=np.arange(-5, 5.5, 0.5)):
+    """Histogram of pulls as a (bin_low, bin_high, count) frame"""
+    pull = results['pull'].dropna().to_numpy()
+    counts, edges = np.histogram(np.clip(pull, bins[0], bins[-1]), bins=bins)
+    return pd.DataFrame({'bin_low': edges[:-1], 'bin_high': edges[1:], 'count': counts})
+
+def validate_all(reference=None, model_sigma=0.0):
+    """Validate KNOWN_EXOTICS, or a reference table file if given"""
+    ref = known_exotics_table() if reference is None else load_reference(reference)
+    return validate_table(ref, model_sigma)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Validate against reference states')
+    parser.add_argument('reference', nargs='?',
+                        help='CSV/JSON reference table (default: KNOWN_EXOTICS)')
+    parser.add_argument('--model-sigma', type=float, default=0.0,
+                        help='model uncertainty added in quadrature (GeV)')
+    parser.add_argument('--out', default='validation_results.csv')
+    args = parser.parse_args()
+
     print("Validating known exotic hadrons...")
-    df = validate_all()
-    print(df)
-    
+    df = validate_all(args.reference, args.model_sigma)
+    print(df.head(30) if len(df) > 30 else df)
+
     # Save results
-    df.to_csv('validation_results.csv', index=False)
-    
+    df.to_csv(args.out, index=False)
+    base = os.path.splitext(args.out)[0]
+    summary = summarize(df)
+    summary.to_csv(base + '_summary.csv', index=False)
+    pull_histogram(df).to_csv(base + '_pulls.csv', index=False)
+
     # Summary
     print(f"\nPassed: {len(df[df['status'] == 'Allowed'])}")
     print(f"Failed: {len(df[df['status'] != 'Allowed'])}")
     print(f"Threshold states: {len(df[df['dE'] > 0])}")
     print(f"Bound states: {len(df[df['dE'] <= 0])}")
+    total, ndf = chi2(df)
+    if ndf:
+        print(f"chi2/ndf: {total:.1f}/{ndf}")
+    print("\nPer-sector summary:")
+    print(summary.to_string(index=False))
@@ -3,22 +3,97 @@
 Generate publication-quality visualizations
 """
 
+import hashlib
+import inspect
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
+import matplotlib
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 
-def create_periodic_table(catalog_file='forbidden_states_catalog.csv'):
+CHUNK_ROWS = 200_000
+CACHE_DIR = '.figure_cache'
+STAMP_FILE = '.figure_stamps.json'
+DPI = 300
+
+# Finest aggregation grid; coarser tables are summed from it
+AGG_KEYS = ['B', 'S', 'J', 'n']
+
+def file_digest(path, block_size=1 << 20):
+    """SHA-256 of a file, read in fixed-size blocks"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def code_digest(*funcs, settings=()):
+    """Short SHA-256 of function sources plus settings, to version cached outputs"""
+    h = hashlib.sha256()
+    for func in funcs:
+        h.update(inspect.getsource(func).encode())
+    h.update(repr(settings).encode())
+    return h.hexdigest()[:12]
+
+def aggregate_catalog(catalog_file, chunksize=CHUNK_ROWS):
+    """Per-(B,S,J,n) row and forbidden counts in one chunked pass"""
+    parts = []
+    reader = pd.read_csv(
+        catalog_file,
+        usecols=['quarks', 'B', 'S', 'J', 'status'],
+        chunksize=chunksize
+    )
+    for chunk in reader:
+        chunk = chunk.assign(
+            n=chunk['quarks'].str.len(),
+            forbidden=(chunk['status'] != 'Allowed').astype(np.int64)
+        )
+        parts.append(
+            chunk.groupby(AGG_KEYS)['forbidden'].agg(total='size', forbidden='sum')
+        )
+
+    # Chunk results are tiny, so one final regroup merges them
+    agg = pd.concat(parts).groupby(level=AGG_KEYS).sum()
+    return agg.reset_index()
+
+def load_aggregates(catalog_file, cache_dir=CACHE_DIR, digest=None):
+    """Return catalog aggregates, cached by the catalog's content hash"""
+    digest = digest or file_digest(catalog_file)
+    version = code_digest(aggregate_catalog, settings=AGG_KEYS)
+    cache_file = os.path.join(cache_dir, f'agg_{digest}_{version}.csv')
+    if os.path.exists(cache_file):
+        return pd.read_csv(cache_file)
+
+    agg = aggregate_catalog(catalog_file)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_file = cache_file + '.tmp'
+    agg.to_csv(tmp_file, index=False)
+    os.replace(tmp_file, cache_file)
+    return agg
+
+def forbidden_fraction(agg, index='S', columns='B'):
+    """Collapse aggregates to a forbidden-fraction pivot table"""
+    cells = agg.groupby([index, columns])[['forbidden', 'total']].sum()
+    frac = cells['forbidden'] / cells['total']
+    return frac.unstack(columns)
+
+def _save(fig, out_base):
+    """Write a figure as PNG and PDF"""
+    for ext in ('png', 'pdf'):
+        fig.savefig(f'{out_base}.{ext}', dpi=DPI, bbox_inches='tight')
+
+def create_periodic_table(catalog_file='forbidden_states_catalog.csv',
+                          agg=None, out_base='entropy_periodic_table'):
     """Create the entropy periodic table heatmap"""
-    df = pd.read_csv(catalog_file)
+    if agg is None:
+        agg = load_aggregates(catalog_file)
     
     # Calculate forbidden fraction for each (B,S) cell
-    heat = df.pivot_table(
-        index='S', 
-        columns='B', 
-        values='status',
-        aggfunc=lambda x: (x != 'Allowed').mean()
-    )
+    heat = forbidden_fraction(agg, index='S', columns='B')
     
     # Create figure
     fig, ax = plt.subplots(figsize=(10, 8))
@@ -47,12 +122,12 @@ def create_periodic_table(catalog_file='forbidden_states_catalog.csv'):
     
     # Save
     plt.tight_layout()
-    plt.savefig('entropy_periodic_table.png', dpi=300, bbox_inches='tight')
-    plt.savefig('entropy_periodic_table.pdf', bbox_inches='tight')
+    _save(fig, out_base)
     
     return fig
 
-def plot_mass_comparison(validation_file='validation_results.csv'):
+def plot_mass_comparison(validation_file='validation_results.csv',
+                         out_base='mass_comparison'):
     """Plot predicted vs observed masses"""
     df = pd.read_csv(validation_file)
     
@@ -76,10 +151,10 @@ def plot_mass_comparison(validation_file='validation_results.csv'):
     ax.plot([min_mass, max_mass], [min_mass, max_mass], 'k--', alpha=0.5)
     
     # Labels
-    for _, row in df.iterrows():
+    for name, m_obs, m_pred in zip(df['name'], df['M_obs'], df['M_pred']):
         ax.annotate(
-            row['name'],
-            (row['M_obs'], row['M_pred']),
+            name,
+            (m_obs, m_pred),
             xytext=(5, 5),
             textcoords='offset points',
             fontsize=8
@@ -91,11 +166,91 @@ def plot_mass_comparison(validation_file='validation_results.csv'):
     ax.legend()
     
     plt.tight_layout()
-    plt.savefig('mass_comparison.pdf', bbox_inches='tight')
+    _save(fig, out_base)
     
     return fig
 
+def render_digest(name):
+    """Version of the code and settings that produce figure `name`"""
+    if name == 'entropy_periodic_table':
+        funcs = (aggregate_catalog, forbidden_fraction, create_periodic_table, _save)
+    else:
+        funcs = (plot_mass_comparison, _save)
+    return code_digest(*funcs, settings=(DPI, AGG_KEYS))
+
+def _use_agg():
+    """Worker initializer: render off-screen without touching the caller's backend"""
+    matplotlib.use('Agg')
+
+def _render_job(job):
+    """Worker entry point: render one figure and release it"""
+    kind, out_base, payload = job
+    if kind == 'periodic_table':
+        fig = create_periodic_table(agg=payload, out_base=out_base)
+    else:
+        fig = plot_mass_comparison(payload, out_base=out_base)
+    plt.close(fig)
+    return out_base
+
+def render_all(catalog_file='forbidden_states_catalog.csv',
+               validation_file='validation_results.csv',
+               out_dir='.', cache_dir=CACHE_DIR, workers=None, force=False):
+    """
+    Regenerate every paper figure whose inputs or rendering code changed.
+    Aggregation is cached by content hash and aggregation-code version,
+    and figures render in parallel worker processes. Returns the list of
+    figures written.
+    """
+    stamp_path = os.path.join(out_dir, STAMP_FILE)
+    stamps = {}
+    if os.path.exists(stamp_path):
+        with open(stamp_path) as f:
+            stamps = json.load(f)
+
+    inputs = {
+        'entropy_periodic_table': catalog_file,
+        'mass_comparison': validation_file,
+    }
+    digests = {}
+    jobs = []
+    for name, src in inputs.items():
+        if not os.path.exists(src):
+            print(f"Skipping {name}: {src} not found")
+            continue
+        digests[name] = f'{file_digest(src)}:{render_digest(name)}'
+        out_base = os.path.join(out_dir, name)
+        up_to_date = all(os.path.exists(f'{out_base}.{ext}') for ext in ('png', 'pdf'))
+        if not force and up_to_date and stamps.get(name) == digests[name]:
+            continue
+        if name == 'entropy_periodic_table':
+            payload = load_aggregates(src, cache_dir, digest=digests[name].split(':')[0])
+            jobs.append(('periodic_table', out_base, payload))
+        else:
+            jobs.append(('mass_comparison', out_base, src))
+
+    if not jobs:
+        return []
+
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_use_agg) as pool:
+            written = list(pool.map(_render_job, jobs))
+    else:
+        written = [_render_job(job) for job in jobs]
+
+    for out_base in written:
+        name = os.path.basename(out_base)
+        stamps[name] = digests[name]
+    with open(stamp_path, 'w') as f:
+        json.dump(stamps, f, indent=2, sort_keys=True)
+
+    return written
+
 if __name__ == "__main__":
-    create_periodic_table()
-    plot_mass_comparison()
-    print("Figures generated successfully!")
+    matplotlib.use('Agg')
+    written = render_all()
+    if written:
+        print(f"Figures generated successfully: {', '.join(written)}")
+    else:
+        print("Figures are up to date.")
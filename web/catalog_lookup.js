@@ -0,0 +1,144 @@
+// Decoder for catalog_index.bin, built by code/build_explorer_index.py.
+// Each configuration sits at its combinatorial rank in a fixed-stride
+// record table, so a lookup is a handful of integer operations and every
+// value is exactly what the Python model produced (no recomputation here).
+
+const CatalogLookup = (() => {
+    const FLAVORS = 'udscbUDSCB';
+    const STATUSES = ['Allowed', 'Energy', 'Pauli', 'Gauge'];
+    const HEADER_BYTES = 16;
+    const SLOT_BYTES = 12;
+    const UNUSED = 0xFF;
+    const BAR = '\u0304';  // combining macron, as in the page's "cc̄ud̄"
+
+    let view = null;
+    let header = null;
+
+    function binom(n, k) {
+        if (k < 0 || k > n) return 0;
+        let r = 1;
+        for (let i = 1; i <= k; i++) r = r * (n - k + i) / i;
+        return Math.round(r);
+    }
+
+    // Per-flavour counts, or null if the string has other characters.
+    // Antiquarks may be upper case ("ccUD") or barred ("ccūd̄").
+    function flavorCounts(quarks) {
+        const counts = new Array(FLAVORS.length).fill(0);
+        const chars = Array.from(quarks.normalize('NFD').replace(/\s+/g, ''));
+        for (let k = 0; k < chars.length; k++) {
+            let ch = chars[k];
+            if (chars[k + 1] === BAR) {
+                if (ch !== ch.toLowerCase()) return null;
+                ch = ch.toUpperCase();
+                k++;
+            }
+            const i = FLAVORS.indexOf(ch);
+            if (i < 0) return null;
+            counts[i]++;
+        }
+        return counts;
+    }
+
+    // Page notation: upper-case antiquark letters become barred lower case
+    function display(quarks) {
+        return Array.from(quarks, ch => ch === ch.toLowerCase() ? ch : ch.toLowerCase() + BAR).join('');
+    }
+
+    function canonical(counts) {
+        return counts.map((c, i) => FLAVORS[i].repeat(c)).join('');
+    }
+
+    // Same ordering as config_rank() in build_explorer_index.py
+    function configRank(counts) {
+        const k = FLAVORS.length;
+        const idx = [];
+        counts.forEach((c, i) => { for (let j = 0; j < c; j++) idx.push(i); });
+        const n = idx.length;
+        let rank = 0;
+        for (let m = header.nMin; m < n; m++) rank += binom(m + k - 1, m);
+        let lo = 0;
+        idx.forEach((v, pos) => {
+            const rest = n - pos - 1;
+            for (let w = lo; w < v; w++) rank += binom(rest + k - w - 1, rest);
+            lo = v;
+        });
+        return rank;
+    }
+
+    async function load(url = 'catalog_index.bin') {
+        const response = await fetch(url);
+        if (!response.ok) throw new Error(`Could not load ${url}: ${response.status}`);
+        view = new DataView(await response.arrayBuffer());
+        const magic = String.fromCharCode(...new Uint8Array(view.buffer, 0, 4));
+        if (magic !== 'QCDX') throw new Error(`${url} is not a catalog index`);
+        header = {
+            version: view.getUint8(4),
+            nMin: view.getUint8(5),
+            nMax: view.getUint8(6),
+            slots: view.getUint8(7),
+            records: view.getUint32(8, true),
+            stride: view.getUint16(12, true),
+        };
+        return header;
+    }
+
+    // Model results for one configuration, e.g. lookup('ccCC'); null if out of range
+    function lookup(quarks) {
+        if (!view) throw new Error('CatalogLookup.load() has not finished');
+        const counts = flavorCounts(quarks);
+        if (!counts) return null;
+        const n = counts.reduce((a, b) => a + b, 0);
+        if (n < header.nMin || n > header.nMax) return null;
+
+        const base = HEADER_BYTES + configRank(counts) * header.stride;
+        const nq = counts.slice(0, 5).reduce((a, b) => a + b, 0);
+        const states = [];
+        for (let slot = 0; slot < header.slots; slot++) {
+            const off = base + 4 + slot * SLOT_BYTES;
+            const status = view.getUint8(off + 8);
+            if (status === UNUSED) break;
+            states.push({
+                J: (n % 2) / 2 + slot,
+                mass: view.getFloat32(off, true),
+                dE: view.getFloat32(off + 4, true),
+                status: STATUSES[status],
+                priorityRank: view.getUint16(off + 10, true) || null,
+            });
+        }
+        return {
+            quarks: canonical(counts),
+            label: display(canonical(counts)),
+            n: n,
+            B: (nq - (n - nq)) / 3,
+            S: -(counts[2] - counts[7]),
+            threshold: view.getFloat32(base, true),
+            states: states,
+        };
+    }
+
+    // Configurations one flavour substitution away that are in the table
+    function neighbours(quarks) {
+        const counts = flavorCounts(quarks);
+        if (!counts) return [];
+        const seen = new Set([canonical(counts)]);
+        const result = [];
+        counts.forEach((c, from) => {
+            if (c === 0) return;
+            for (let to = 0; to < FLAVORS.length; to++) {
+                if (to === from) continue;
+                const next = counts.slice();
+                next[from]--;
+                next[to]++;
+                const key = canonical(next);
+                if (seen.has(key)) continue;
+                seen.add(key);
+                const entry = lookup(key);
+                if (entry) result.push(entry);
+            }
+        });
+        return result;
+    }
+
+    return { load, lookup, neighbours, display, FLAVORS, STATUSES };
+})();